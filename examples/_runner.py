@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+The scaffolding shared by the examples. It connects to the brick daemon, waits
+for a certain bricklet to be enumerated, then runs the demo of the example and
+prints all callbacks sent by the bricklet.
+"""
+import asyncio
+from collections import deque
+import logging
+import os
+import sys
+import warnings
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None    # uvloop is optional and not available on Windows
+
+from tinkerforge_async.ip_connection import IPConnectionAsync
+from tinkerforge_async.device_factory import device_factory
+
+
+class CallbackQueue:
+    """
+    A minimal unbounded queue for a single consumer. It implements the parts of
+    the asyncio.Queue interface used by the devices and process_callbacks().
+    """
+    def __init__(self):
+        self.__items = deque()
+        self.__not_empty = asyncio.Event()
+        self.processed_count = 0    # The number of packets printed by process_callbacks()
+
+    def empty(self):
+        """
+        Returns *True* if there are no packets in the queue.
+        """
+        return not self.__items
+
+    def put_nowait(self, item):
+        """
+        Append a packet to the queue and wake up the consumer.
+        """
+        self.__items.append(item)
+        self.__not_empty.set()
+
+    def get_nowait(self):
+        """
+        Remove and return a packet. Raises asyncio.QueueEmpty if there is none.
+        """
+        try:
+            return self.__items.popleft()
+        except IndexError:
+            raise asyncio.QueueEmpty from None
+
+    async def get(self):
+        """
+        Remove and return a packet. If the queue is empty, wait until a packet
+        is available.
+        """
+        while not self.__items:
+            self.__not_empty.clear()
+            await self.__not_empty.wait()
+        return self.__items.popleft()
+
+
+ipcon = IPConnectionAsync()
+callback_queue = CallbackQueue()
+callback_received = asyncio.Event()    # Set by process_callbacks() whenever callbacks were received
+
+
+async def process_callbacks():
+    """
+    This infinite loop will print all callbacks.
+    It waits for packets from the callback queue,
+    which the ip connection will push. All packets, that are already
+    queued, are written to stdout at once.
+    """
+    get, get_nowait, empty = callback_queue.get, callback_queue.get_nowait, callback_queue.empty
+    write, flush = sys.stdout.write, sys.stdout.flush
+    try:
+        while True:
+            batch = [f'Callback received {await get()}\n']
+            while not empty():
+                batch.append(f'Callback received {get_nowait()}\n')
+            write(''.join(batch))
+            flush()
+            callback_queue.processed_count += len(batch)
+            callback_received.set()
+    except asyncio.CancelledError:
+        print('Callback queue canceled')
+
+
+async def wait_for_callbacks(count=2, timeout=3.0):
+    """
+    Wait until process_callbacks() has received another *count* callbacks, but
+    no longer than *timeout* seconds.
+    """
+    expected_count = callback_queue.processed_count + count
+
+    async def wait():
+        while callback_queue.processed_count < expected_count:
+            callback_received.clear()
+            await callback_received.wait()
+
+    try:
+        await asyncio.wait_for(wait(), timeout)
+    except asyncio.TimeoutError:
+        print('Timeout while waiting for callbacks')
+
+
+async def process_enumerations(device_class, demo):
+    """
+    This loop pulls events from the internal enumeration queue of the ip
+    connection and waits for an enumeration event with the device id of
+    *device_class*, then it will run the *demo* and return.
+    """
+    get = ipcon.enumeration_queue.get
+    try:
+        while True:
+            packet = await get()
+            if packet['device_id'] is device_class.DEVICE_IDENTIFIER:
+                print('Registering bricklet')
+                bricklet = device_factory.get(packet['device_id'], packet['uid'], ipcon)    # Create device object
+                await demo(bricklet)
+                break
+    except asyncio.CancelledError:
+        print('Enumeration queue canceled')
+
+
+async def run_example_generic(bricklet):
+    """
+    This is a demo of the generic features of the Tinkerforge bricklets with a
+    microcontroller.
+    """
+    uid = await bricklet.read_uid()
+    print('Device uid:', uid)
+    await bricklet.write_uid(uid)
+
+    spitfp_error_count, bootloader_mode = await asyncio.gather(bricklet.get_spitfp_error_count(), bricklet.get_bootloader_mode())
+    print('SPI error count:', spitfp_error_count)
+
+    print('Current bootloader mode:', bootloader_mode)
+    bootloader_mode = bricklet.BootloaderMode.FIRMWARE
+    print('Setting bootloader mode to', bootloader_mode, ':', await bricklet.set_bootloader_mode(bootloader_mode))
+
+    print('Disable status LED')
+    await bricklet.set_status_led_config(bricklet.LedConfig.OFF)
+    print('Current status:', await bricklet.get_status_led_config())
+    await asyncio.sleep(1)
+    print('Enable status LED')
+    await bricklet.set_status_led_config(bricklet.LedConfig.SHOW_STATUS)
+    print('Current status:', await bricklet.get_status_led_config())
+
+    print('Get Chip temperature:', await bricklet.get_chip_temperature(), '°C')
+
+    print('Reset Bricklet')
+    await bricklet.reset()
+
+
+async def main(device_class, demo):
+    """
+    The main loop, that will spawn all callback handlers and wait until they are
+    done. There are two callback handlers, one waits for the bricklet to connect
+    and run the demo, the other handles messages sent by the bricklet.
+    """
+    try:
+        await ipcon.connect(host='127.0.0.1', port=4223)
+        # The task group cancels all tasks if one of them fails
+        async with asyncio.TaskGroup() as task_group:
+            callback_task = task_group.create_task(process_callbacks())
+            enumeration_task = task_group.create_task(process_enumerations(device_class, demo))
+            print('Enumerating brick and waiting for bricklets to reply')
+            await ipcon.enumerate()
+            # Wait for the demo to finish, then stop the callback consumer
+            await enumeration_task
+            callback_task.cancel()
+    except ConnectionRefusedError:
+        print('Could not connect to server. Connection refused. Is the brick daemon up?')
+    except asyncio.CancelledError:
+        print('Stopped the main loop')
+    finally:
+        await ipcon.disconnect()    # Disconnect the ip connection last to allow cleanup of the sensors
+
+
+def run(device_class, demo):
+    """
+    Run the coroutine function *demo* with the first bricklet of type
+    *device_class* found. The demo is called with the bricklet. All callbacks
+    registered with the module level callback_queue are printed.
+    """
+    # Report all mistakes managing asynchronous resources, if TF_RESOURCE_WARNINGS is set.
+    if os.environ.get('TF_RESOURCE_WARNINGS'):
+        warnings.simplefilter('always', ResourceWarning)
+    # Enable logs from the ip connection. Set TF_LOG to INFO or DEBUG for more info
+    logging.basicConfig(level=os.environ.get('TF_LOG', 'WARNING').upper())
+
+    if uvloop is not None:
+        uvloop.install()    # Use the faster libuv based event loop instead of the default asyncio loop
+
+    # Start the main loop and run the async loop forever. Set TF_DEBUG=1 to enable the asyncio debug mode.
+    asyncio.run(main(device_class, demo), debug=bool(os.environ.get('TF_DEBUG')))
@@ -5,82 +5,17 @@ An example to demonstrate most of the capabilities of the Tinkerforge
 Humidity Bricklet 2.0.
 """
 import asyncio
-import logging
-import warnings
 
-from tinkerforge_async.ip_connection import IPConnectionAsync
-from tinkerforge_async.device_factory import device_factory
 from tinkerforge_async.bricklet_humidity_v2 import BrickletHumidityV2
+from _runner import callback_queue, run, wait_for_callbacks, run_example_generic
 
-ipcon = IPConnectionAsync()
-running_tasks = []
 
-
-async def process_callbacks(queue):
-    """
-    This infinite loop will print all callbacks.
-    It waits for packets from the callback queue,
-    which the ip connection will push.
-    """
-    try:
-        while 'queue not canceled':
-            packet = await queue.get()
-            print('Callback received', packet)
-    except asyncio.CancelledError:
-        print('Callback queue canceled')
-
-
-async def process_enumerations(callback_queue):
-    """
-    This infinite loop pulls events from the internal enumeration queue
-    of the ip connection and waits for an enumeration event with a
-    certain device id, then it will run the example code.
-    """
-    try:
-        while 'queue not canceled':
-            packet = await ipcon.enumeration_queue.get()
-            if packet['device_id'] is BrickletHumidityV2.DEVICE_IDENTIFIER:
-                await run_example(packet, callback_queue)
-    except asyncio.CancelledError:
-        print('Enumeration queue canceled')
-
-
-async def run_example_generic(bricklet):
-    """
-    This is a demo of the generic features of the Tinkerforge bricklets with a
-    microcontroller.
-    """
-    uid = await bricklet.read_uid()
-    print('Device uid:', uid)
-    await bricklet.write_uid(uid)
-
-    print('SPI error count:', await bricklet.get_spitfp_error_count())
-
-    print('Current bootloader mode:', await bricklet.get_bootloader_mode())
-    bootloader_mode = bricklet.BootloaderMode.FIRMWARE
-    print('Setting bootloader mode to', bootloader_mode, ':', await bricklet.set_bootloader_mode(bootloader_mode))
-
-    print('Disable status LED')
-    await bricklet.set_status_led_config(bricklet.LedConfig.OFF)
-    print('Current status:', await bricklet.get_status_led_config())
-    await asyncio.sleep(1)
-    print('Enable status LED')
-    await bricklet.set_status_led_config(bricklet.LedConfig.SHOW_STATUS)
-    print('Current status:', await bricklet.get_status_led_config())
-
-    print('Get Chip temperature:', await bricklet.get_chip_temperature(), '°C')
-
-    print('Reset Bricklet')
-    await bricklet.reset()
-
-
-async def run_example(packet, callback_queue):
+async def run_example(bricklet):
     """
     This is the actual demo. If the bricklet is found, this code will be run.
     """
-    print('Registering bricklet')
-    bricklet = device_factory.get(packet['device_id'], packet['uid'], ipcon)    # Create device object
-    print('Identity:', await bricklet.get_identity())
+    greater_than = bricklet.ThresholdOption.GREATER_THAN
+    identity_task = asyncio.create_task(bricklet.get_identity())    # Query the identity while configuring the bricklet
 
     # Register the callback queue used by process_callbacks()
     # We can register the same queue for multiple callbacks.
@@ -88,6 +23,7 @@ async def run_example(packet, callback_queue):
     bricklet.register_event_queue(bricklet.CallbackID.TEMPERATURE, callback_queue)
 
     print('Moving average configuration:', await bricklet.get_moving_average_configuration())
+    print('Identity:', await identity_task)
     print('Setting moving average to 20 samples -> 50 ms/sample * 20 samples = 1 s')
     await bricklet.set_moving_average_configuration(20, 20)
     print('Moving average configuration:', await bricklet.get_moving_average_configuration())
@@ -98,9 +34,9 @@ async def run_example(packet, callback_queue):
     print('Set callback period to', 1000, 'ms')
     print('Set threshold to >10 %rH and wait for callbacks')
     # We use a low humidity value on purpose, so that the callback will be triggered
-    await bricklet.set_humidity_callback_configuration(period=1000, value_has_to_change=False, option=bricklet.ThresholdOption.GREATER_THAN, minimum=10, maximum=0)
+    await bricklet.set_humidity_callback_configuration(period=1000, value_has_to_change=False, option=greater_than, minimum=10, maximum=0)
     print('Humidity callback configuration:', await bricklet.get_humidity_callback_configuration())
-    await asyncio.sleep(2.1)    # Wait for 2-3 callbacks
+    await wait_for_callbacks(2)    # Wait for 2 callbacks
     print('Disable threshold callback')
     await bricklet.set_humidity_callback_configuration()
     print('Humidity callback configuration:', await bricklet.get_humidity_callback_configuration())
@@ -109,20 +45,19 @@ async def run_example(packet, callback_queue):
     print('Get temperature:', await bricklet.get_temperature())
     print('Set callback period to', 1000, 'ms')
     print('Set threshold to >10 °C and wait for callbacks')
-    await bricklet.set_temperature_callback_configuration(1000, False, bricklet.ThresholdOption.GREATER_THAN, 10, 0)
+    await bricklet.set_temperature_callback_configuration(1000, False, greater_than, 10, 0)
     print('Temperature callback configuration:', await bricklet.get_temperature_callback_configuration())
-    await asyncio.sleep(2.1)    # Wait for 2-3 callbacks
+    await wait_for_callbacks(2)    # Wait for 2 callbacks
     print('Disable threshold callback')
     await bricklet.set_temperature_callback_configuration()
     print('Temperature callback configuration:', await bricklet.get_temperature_callback_configuration())
 
     print('Enable both callbacks at once')
-    await bricklet.set_temperature_callback_configuration(1000, False)
-    await bricklet.set_humidity_callback_configuration(1000, False)
+    await asyncio.gather(bricklet.set_temperature_callback_configuration(1000, False), bricklet.set_humidity_callback_configuration(1000, False))
     print('Enabling heater')
     await bricklet.set_heater_configuration(bricklet.HeaterConfig.ENABLED)
     print('Heater config:', await bricklet.get_heater_configuration())
-    await asyncio.sleep(5)    # Wait for 2-3 callbacks
+    await wait_for_callbacks(4, timeout=6.0)    # Wait for 2 callbacks of each kind. Allow some extra time for the heater.
     print('Disable both callbacks and heater')
     await asyncio.gather(bricklet.set_temperature_callback_configuration(), bricklet.set_humidity_callback_configuration(), bricklet.set_heater_configuration())
     print('Heater config:', await bricklet.get_heater_configuration())
@@ -131,57 +66,6 @@ async def run_example(packet, callback_queue):
     # new bricklets that have a microcontroller
     await run_example_generic(bricklet)
 
-    # Terminate the loop
-    asyncio.create_task(shutdown())
-
-
-async def shutdown():
-    """
-    Clean up: Disconnect ip connection and stop the consumers
-    """
-    for task in running_tasks:
-        task.cancel()
-    await asyncio.gather(*running_tasks)
-    await ipcon.disconnect()    # Disconnect the ip connection last to allow cleanup of the sensors
-
-
-def error_handler(task):
-    """
-    The main error handler. It will shutdown on any uncaught exception
-    """
-    try:
-        task.result()
-    except Exception:  # pylint: disable=broad-except
-        # Normally we should log these errors
-        asyncio.create_task(shutdown())
-
-
-async def main():
-    """
-    The main loop, that will spawn all callback handlers and wait until they are
-    done. There are two callback handlers, one waits for the bricklet to connect
-    and run the demo, the other handles messages sent by the bricklet.
-    """
-    try:
-        await ipcon.connect(host='127.0.0.1', port=4223)
-        callback_queue = asyncio.Queue()
-        running_tasks.append(asyncio.create_task(process_callbacks(callback_queue)))
-        running_tasks[-1].add_done_callback(error_handler)  # Add error handler to catch exceptions
-        running_tasks.append(asyncio.create_task(process_enumerations(callback_queue)))
-        running_tasks[-1].add_done_callback(error_handler)  # Add error handler to catch exceptions
-        print('Enumerating brick and waiting for bricklets to reply')
-        await ipcon.enumerate()
-
-        # Wait for run_example() to finish
-        await asyncio.gather(*running_tasks)
-    except ConnectionRefusedError:
-        print('Could not connect to server. Connection refused. Is the brick daemon up?')
-    except asyncio.CancelledError:
-        print('Stopped the main loop')
-
-# Report all mistakes managing asynchronous resources.
-warnings.simplefilter('always', ResourceWarning)
-logging.basicConfig(level=logging.INFO)    # Enable logs from the ip connection. Set to debug for even more info
 
-# Start the main loop and run the async loop forever
-asyncio.run(main(), debug=True)
+if __name__ == '__main__':
+    run(BrickletHumidityV2, run_example)
@@ -1 +1 @@
-from _version import __version__
+from ._version import __version__
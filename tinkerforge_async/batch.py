@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers to query several Bricks and Bricklets at once. The requests are
+multiplexed over the ip connection using their sequence numbers, so they can be
+sent back-to-back without waiting for the previous reply.
+"""
+import asyncio
+
+
+async def read(requests):
+    """
+    Calls the getters given in *requests* concurrently and returns their results
+    in the same order. Each request is a tuple of the device, the name of the
+    method and optionally its arguments, e.g.
+    [(temperature_bricklet, 'get_temperature'), (humidity_bricklet, 'get_humidity')].
+
+    All requests are written to the connection in a single write, before the
+    replies are awaited, so reading N devices takes about one round trip instead
+    of N. Up to 15 requests can be pending per ip connection, because of the 4
+    bit sequence number of the protocol. Additional requests wait for a free
+    sequence number.
+
+    If a request fails, its exception is raised and the results of the other
+    requests are discarded.
+    """
+    return await asyncio.gather(*(getattr(device, method)(*args) for device, method, *args in requests))
@@ -8,13 +8,18 @@ Tinkerforge ip connection and also handles conversion of raw units to SI units.
 from collections import namedtuple
 from decimal import Decimal
 from enum import Enum, unique
+import struct
 
 from .devices import DeviceIdentifier, Device, ThresholdOption
-from .ip_connection_helper import pack_payload, unpack_payload
 
 GetIlluminanceCallbackThreshold = namedtuple('IlluminanceCallbackThreshold', ['option', 'minimum', 'maximum'])
 GetConfiguration = namedtuple('Configuration', ['illuminance_range', 'integration_time'])
 
+# Precompiled structs of the fixed size payloads
+_UINT32 = struct.Struct('<I')
+_THRESHOLD = struct.Struct('<cII')
+_CONFIGURATION = struct.Struct('<BB')
+
 
 @unique
 class CallbackID(Enum):
@@ -41,6 +46,17 @@ class FunctionID(Enum):
     GET_CONFIGURATION = 9
 
 
+_FID_GET_ILLUMINANCE = FunctionID.GET_ILLUMINANCE.value
+_FID_SET_ILLUMINANCE_CALLBACK_PERIOD = FunctionID.SET_ILLUMINANCE_CALLBACK_PERIOD.value
+_FID_GET_ILLUMINANCE_CALLBACK_PERIOD = FunctionID.GET_ILLUMINANCE_CALLBACK_PERIOD.value
+_FID_SET_ILLUMINANCE_CALLBACK_THRESHOLD = FunctionID.SET_ILLUMINANCE_CALLBACK_THRESHOLD.value
+_FID_GET_ILLUMINANCE_CALLBACK_THRESHOLD = FunctionID.GET_ILLUMINANCE_CALLBACK_THRESHOLD.value
+_FID_SET_DEBOUNCE_PERIOD = FunctionID.SET_DEBOUNCE_PERIOD.value
+_FID_GET_DEBOUNCE_PERIOD = FunctionID.GET_DEBOUNCE_PERIOD.value
+_FID_SET_CONFIGURATION = FunctionID.SET_CONFIGURATION.value
+_FID_GET_CONFIGURATION = FunctionID.GET_CONFIGURATION.value
+
+
 @unique
 class IlluminanceRange(Enum):
     """
@@ -76,6 +92,7 @@ class BrickletAmbientLightV2(Device):
     """
     Measures ambient light up to 64000lux
     """
+    __slots__ = ()
 
     DEVICE_IDENTIFIER = DeviceIdentifier.BRICKLET_AMBIENT_LIGHT_V2
     DEVICE_DISPLAY_NAME = 'Ambient Light Bricklet 2.0'
@@ -116,10 +133,11 @@ class BrickletAmbientLightV2(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_ILLUMINANCE,
+            function_id=_FID_GET_ILLUMINANCE,
             response_expected=True
         )
-        return self.__value_to_si(unpack_payload(payload, 'I'))
+        value, = _UINT32.unpack_from(payload)
+        return self.__value_to_si(value)
 
     async def set_illuminance_callback_period(self, period=0, response_expected=True):
         """
@@ -133,8 +151,9 @@ class BrickletAmbientLightV2(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_ILLUMINANCE_CALLBACK_PERIOD,
-            data=pack_payload((int(period),), 'I'),
+            function_id=_FID_SET_ILLUMINANCE_CALLBACK_PERIOD,
+            payload_struct=_UINT32,
+            payload_args=(int(period),),
             response_expected=response_expected,
         )
 
@@ -144,10 +163,11 @@ class BrickletAmbientLightV2(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_ILLUMINANCE_CALLBACK_PERIOD,
+            function_id=_FID_GET_ILLUMINANCE_CALLBACK_PERIOD,
             response_expected=True
         )
-        return unpack_payload(payload, 'I')
+        period, = _UINT32.unpack_from(payload)
+        return period
 
     async def set_illuminance_callback_threshold(self, option=ThresholdOption.OFF, minimum=0, maximum=0, response_expected=True):
         """
@@ -172,13 +192,13 @@ class BrickletAmbientLightV2(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_ILLUMINANCE_CALLBACK_THRESHOLD,
-            data=pack_payload(
-              (
-                option.value.encode('ascii'),
+            function_id=_FID_SET_ILLUMINANCE_CALLBACK_THRESHOLD,
+            payload_struct=_THRESHOLD,
+            payload_args=(
+                option.encoded,
                 self.__si_to_value(minimum),
-                self.__si_to_value(maximum)
-              ), 'c I I'),
+                self.__si_to_value(maximum),
+            ),
             response_expected=response_expected
         )
 
@@ -188,13 +208,13 @@ class BrickletAmbientLightV2(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_ILLUMINANCE_CALLBACK_THRESHOLD,
+            function_id=_FID_GET_ILLUMINANCE_CALLBACK_THRESHOLD,
             response_expected=True
         )
-        option, minimum, maximum = unpack_payload(payload, 'c I I')
-        option = ThresholdOption(option)
+        option, minimum, maximum = _THRESHOLD.unpack_from(payload)
+        option = ThresholdOption.from_encoded(option)
         minimum, maximum = self.__value_to_si(minimum), self.__value_to_si(maximum)
-        return GetIlluminanceCallbackThreshold(option, minimum, maximum)
+        return GetIlluminanceCallbackThreshold._make((option, minimum, maximum))
 
     async def set_debounce_period(self, debounce_period=100, response_expected=True):
         """
@@ -212,8 +232,9 @@ class BrickletAmbientLightV2(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_DEBOUNCE_PERIOD,
-            data=pack_payload((int(debounce_period),), 'I'),
+            function_id=_FID_SET_DEBOUNCE_PERIOD,
+            payload_struct=_UINT32,
+            payload_args=(int(debounce_period),),
             response_expected=response_expected
         )
 
@@ -223,10 +244,11 @@ class BrickletAmbientLightV2(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_DEBOUNCE_PERIOD,
+            function_id=_FID_GET_DEBOUNCE_PERIOD,
             response_expected=True
         )
-        return unpack_payload(payload, 'I')
+        debounce_period, = _UINT32.unpack_from(payload)
+        return debounce_period
 
     async def set_configuration(self, illuminance_range, integration_time, response_expected=True):
         """
@@ -261,8 +283,9 @@ class BrickletAmbientLightV2(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_CONFIGURATION,
-            data=pack_payload((illuminance_range.value, integration_time.value), 'B B'),
+            function_id=_FID_SET_CONFIGURATION,
+            payload_struct=_CONFIGURATION,
+            payload_args=(illuminance_range.value, integration_time.value),
             response_expected=response_expected
         )
 
@@ -272,11 +295,11 @@ class BrickletAmbientLightV2(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_CONFIGURATION,
+            function_id=_FID_GET_CONFIGURATION,
             response_expected=True
         )
-        illuminance_range, integration_time = unpack_payload(payload, 'B B')
-        return GetConfiguration(IlluminanceRange(illuminance_range), IntegrationTime(integration_time))
+        illuminance_range, integration_time = _CONFIGURATION.unpack_from(payload)
+        return GetConfiguration._make((IlluminanceRange(illuminance_range), IntegrationTime(integration_time)))
 
     @staticmethod
     def __value_to_si(value):
@@ -287,8 +310,13 @@ class BrickletAmbientLightV2(Device):
 
     @staticmethod
     def __si_to_value(value):
-        return int(value * 100)
+        """
+        Convert the SI value to the sensor value. The value is rounded, because
+        int() truncates floats like 0.29 * 100 = 28.999999999999996.
+        """
+        return round(value * 100)
 
     def _process_callback_payload(self, header, payload):
-        payload = unpack_payload(payload, self.CALLBACK_FORMATS[header['function_id']])
-        return self.__value_to_si(payload), True    # payload, done
+        # Both callbacks return the illuminance as an uint32
+        value, = _UINT32.unpack_from(payload)
+        return self.__value_to_si(value), True    # payload, done
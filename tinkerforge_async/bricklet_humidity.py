@@ -6,15 +6,19 @@ implemented using Python AsyncIO. It does the low-lvel communication with the
 Tinkerforge ip connection and also handles conversion of raw units to SI units.
 """
 from collections import namedtuple
-from decimal import Decimal
 from enum import Enum, unique
+import struct
 
 from .devices import DeviceIdentifier, Device, ThresholdOption
-from .ip_connection_helper import pack_payload, unpack_payload
 
 GetHumidityCallbackThreshold = namedtuple('HumidityCallbackThreshold', ['option', 'minimum', 'maximum'])
 GetAnalogValueCallbackThreshold = namedtuple('AnalogValueCallbackThreshold', ['option', 'minimum', 'maximum'])
 
+# Precompiled structs of the payloads
+_UINT16 = struct.Struct('<H')
+_UINT32 = struct.Struct('<I')
+_THRESHOLD = struct.Struct('<cHH')
+
 
 @unique
 class CallbackID(Enum):
@@ -46,10 +50,26 @@ class FunctionID(Enum):
     GET_DEBOUNCE_PERIOD = 12
 
 
+_FID_GET_HUMIDITY = FunctionID.GET_HUMIDITY.value
+_FID_GET_ANALOG_VALUE = FunctionID.GET_ANALOG_VALUE.value
+_FID_SET_HUMIDITY_CALLBACK_PERIOD = FunctionID.SET_HUMIDITY_CALLBACK_PERIOD.value
+_FID_GET_HUMIDITY_CALLBACK_PERIOD = FunctionID.GET_HUMIDITY_CALLBACK_PERIOD.value
+_FID_SET_ANALOG_VALUE_CALLBACK_PERIOD = FunctionID.SET_ANALOG_VALUE_CALLBACK_PERIOD.value
+_FID_GET_ANALOG_VALUE_CALLBACK_PERIOD = FunctionID.GET_ANALOG_VALUE_CALLBACK_PERIOD.value
+_FID_SET_HUMIDITY_CALLBACK_THRESHOLD = FunctionID.SET_HUMIDITY_CALLBACK_THRESHOLD.value
+_FID_GET_HUMIDITY_CALLBACK_THRESHOLD = FunctionID.GET_HUMIDITY_CALLBACK_THRESHOLD.value
+_FID_SET_ANALOG_VALUE_CALLBACK_THRESHOLD = FunctionID.SET_ANALOG_VALUE_CALLBACK_THRESHOLD.value
+_FID_GET_ANALOG_VALUE_CALLBACK_THRESHOLD = FunctionID.GET_ANALOG_VALUE_CALLBACK_THRESHOLD.value
+_FID_SET_DEBOUNCE_PERIOD = FunctionID.SET_DEBOUNCE_PERIOD.value
+_FID_GET_DEBOUNCE_PERIOD = FunctionID.GET_DEBOUNCE_PERIOD.value
+
+
 class BrickletHumidity(Device):
     """
     Measures relative humidity
     """
+    __slots__ = ('__cache',)
+
     DEVICE_IDENTIFIER = DeviceIdentifier.BRICKLET_HUMIDITY
     DEVICE_DISPLAY_NAME = 'Humidity Bricklet'
 
@@ -73,6 +93,8 @@ class BrickletHumidity(Device):
         super().__init__(self.DEVICE_DISPLAY_NAME, uid, ipcon)
 
         self.api_version = (2, 0, 1)
+        # The configuration last set or read, see the *cached* parameter of the getters
+        self.__cache = {}
 
     async def get_humidity(self):
         """
@@ -86,10 +108,11 @@ class BrickletHumidity(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_HUMIDITY,
+            function_id=_FID_GET_HUMIDITY,
             response_expected=True
         )
-        return self.__value_to_si(unpack_payload(payload, 'H'))
+        value, = _UINT16.unpack_from(payload)
+        return self.__value_to_si(value)
 
     async def get_analog_value(self):
         """
@@ -111,10 +134,11 @@ class BrickletHumidity(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_ANALOG_VALUE,
+            function_id=_FID_GET_ANALOG_VALUE,
             response_expected=True
         )
-        return unpack_payload(payload, 'H')
+        value, = _UINT16.unpack_from(payload)
+        return value
 
     async def set_humidity_callback_period(self, period=0, response_expected=True):
         """
@@ -130,21 +154,32 @@ class BrickletHumidity(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_HUMIDITY_CALLBACK_PERIOD,
-            data=pack_payload((int(period),), 'I'),
+            function_id=_FID_SET_HUMIDITY_CALLBACK_PERIOD,
+            payload_struct=_UINT32,
+            payload_args=(int(period),),
             response_expected=response_expected,
         )
+        self.__cache['humidity_callback_period'] = int(period)
 
-    async def get_humidity_callback_period(self):
+    async def get_humidity_callback_period(self, cached=False):
         """
         Returns the period as set by :func:`Set Humidity Callback Period`.
+
+        If *cached* is True, the period last set or read by this object is
+        returned without querying the bricklet. The cache does not notice, if the
+        bricklet was reset.
         """
+        if cached and 'humidity_callback_period' in self.__cache:
+            return self.__cache['humidity_callback_period']
+
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_HUMIDITY_CALLBACK_PERIOD,
+            function_id=_FID_GET_HUMIDITY_CALLBACK_PERIOD,
             response_expected=True
         )
-        return unpack_payload(payload, 'I')
+        period, = _UINT32.unpack_from(payload)
+        self.__cache['humidity_callback_period'] = period
+        return period
 
     async def set_analog_value_callback_period(self, period=0, response_expected=True):
         """
@@ -160,21 +195,32 @@ class BrickletHumidity(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_ANALOG_VALUE_CALLBACK_PERIOD,
-            data=pack_payload((int(period),), 'I'),
+            function_id=_FID_SET_ANALOG_VALUE_CALLBACK_PERIOD,
+            payload_struct=_UINT32,
+            payload_args=(int(period),),
             response_expected=response_expected,
         )
+        self.__cache['analog_value_callback_period'] = int(period)
 
-    async def get_analog_value_callback_period(self):
+    async def get_analog_value_callback_period(self, cached=False):
         """
         Returns the period as set by :func:`Set Analog Value Callback Period`.
+
+        If *cached* is True, the period last set or read by this object is
+        returned without querying the bricklet. The cache does not notice, if the
+        bricklet was reset.
         """
+        if cached and 'analog_value_callback_period' in self.__cache:
+            return self.__cache['analog_value_callback_period']
+
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_ANALOG_VALUE_CALLBACK_PERIOD,
+            function_id=_FID_GET_ANALOG_VALUE_CALLBACK_PERIOD,
             response_expected=True
         )
-        return unpack_payload(payload, 'I')
+        period, = _UINT32.unpack_from(payload)
+        self.__cache['analog_value_callback_period'] = period
+        return period
 
     async def set_humidity_callback_threshold(self, option=ThresholdOption.OFF, minimum=0, maximum=0, response_expected=True):
         """
@@ -199,13 +245,13 @@ class BrickletHumidity(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_HUMIDITY_CALLBACK_THRESHOLD,
-            data=pack_payload(
-              (
-                option.value.encode('ascii'),
+            function_id=_FID_SET_HUMIDITY_CALLBACK_THRESHOLD,
+            payload_struct=_THRESHOLD,
+            payload_args=(
+                option.encoded,
                 self.__si_to_value(minimum),
-                self.__si_to_value(maximum)
-              ), 'c H H'),
+                self.__si_to_value(maximum),
+            ),
             response_expected=response_expected
         )
 
@@ -215,13 +261,13 @@ class BrickletHumidity(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_HUMIDITY_CALLBACK_THRESHOLD,
+            function_id=_FID_GET_HUMIDITY_CALLBACK_THRESHOLD,
             response_expected=True
         )
-        option, minimum, maximum = unpack_payload(payload, 'c h h')
-        option = ThresholdOption(option)
+        option, minimum, maximum = _THRESHOLD.unpack_from(payload)
+        option = ThresholdOption.from_encoded(option)
         minimum, maximum = self.__value_to_si(minimum), self.__value_to_si(maximum)
-        return GetHumidityCallbackThreshold(option, minimum, maximum)
+        return GetHumidityCallbackThreshold._make((option, minimum, maximum))
 
     async def set_analog_value_callback_threshold(self, option=ThresholdOption.OFF, minimum=0, maximum=0, response_expected=True):
         """
@@ -246,8 +292,9 @@ class BrickletHumidity(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_ANALOG_VALUE_CALLBACK_THRESHOLD,
-            data=pack_payload((option.value.encode('ascii'), int(minimum), int(maximum)), 'c H H'),
+            function_id=_FID_SET_ANALOG_VALUE_CALLBACK_THRESHOLD,
+            payload_struct=_THRESHOLD,
+            payload_args=(option.encoded, int(minimum), int(maximum)),
             response_expected=response_expected
         )
 
@@ -257,12 +304,11 @@ class BrickletHumidity(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_ANALOG_VALUE_CALLBACK_THRESHOLD,
+            function_id=_FID_GET_ANALOG_VALUE_CALLBACK_THRESHOLD,
             response_expected=True
         )
-        payload = unpack_payload(payload, 'c H H')
-        payload[0] = ThresholdOption(payload[0])
-        return GetAnalogValueCallbackThreshold(*payload)
+        option, minimum, maximum = _THRESHOLD.unpack_from(payload)
+        return GetAnalogValueCallbackThreshold._make((ThresholdOption.from_encoded(option), minimum, maximum))
 
     async def set_debounce_period(self, debounce_period=100, response_expected=True):
         """
@@ -284,39 +330,57 @@ class BrickletHumidity(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_DEBOUNCE_PERIOD,
-            data=pack_payload((int(debounce_period),), 'I'),
+            function_id=_FID_SET_DEBOUNCE_PERIOD,
+            payload_struct=_UINT32,
+            payload_args=(int(debounce_period),),
             response_expected=response_expected
         )
+        self.__cache['debounce_period'] = int(debounce_period)
 
-    async def get_debounce_period(self):
+    async def get_debounce_period(self, cached=False):
         """
         Returns the debounce period as set by :func:`Set Debounce Period`.
+
+        If *cached* is True, the debounce period last set or read by this object is
+        returned without querying the bricklet. The cache does not notice, if the
+        bricklet was reset.
         """
+        if cached and 'debounce_period' in self.__cache:
+            return self.__cache['debounce_period']
+
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_DEBOUNCE_PERIOD,
+            function_id=_FID_GET_DEBOUNCE_PERIOD,
             response_expected=True
         )
-        return unpack_payload(payload, 'I')
+        debounce_period, = _UINT32.unpack_from(payload)
+        self.__cache['debounce_period'] = debounce_period
+        return debounce_period
 
     @staticmethod
     def __value_to_si(value):
         """
-        Convert to the sensor value to SI units
+        Convert to the sensor value to SI units. The value is returned as a
+        float, because the resolution of the sensor is well within the precision
+        of a float and a decimal.Decimal is expensive to create for every callback.
         """
-        return Decimal(value) / 10
+        return value / 10
 
     @staticmethod
     def __si_to_value(value):
-        return int(value * 10)
+        """
+        Convert the SI value to the sensor value. The value is rounded to the
+        nearest sensor value instead of being truncated by int().
+        """
+        return round(value * 10)
 
     def _process_callback_payload(self, header, payload):
-        payload = unpack_payload(payload, self.CALLBACK_FORMATS[header['function_id']])
+        # All callbacks return an uint16, so there is no need to look up the format
+        value, = _UINT16.unpack_from(payload)
         if header['function_id'] is CallbackID.HUMIDITY or header['function_id'] is CallbackID.HUMIDITY_REACHED:
             header['sid'] = 0
-            result = self.__value_to_si(payload), True    # payload, done
+            result = self.__value_to_si(value), True    # payload, done
         else:
             header['sid'] = 1
-            result = payload, True    # payload, done
+            result = value, True    # payload, done
         return result
@@ -5,18 +5,33 @@ Module for the Tinkerforge Industrial Dual Analog In Bricklet 2.0
 implemented using Python AsyncIO. It does the low-lvel communication with the
 Tinkerforge ip connection and also handles conversion of raw units to SI units.
 """
+from array import array
 from collections import namedtuple
 from decimal import Decimal
 from enum import Enum, unique
+import struct
 
 from .devices import DeviceIdentifier, BrickletWithMCU, ThresholdOption, LedConfig
-from .ip_connection_helper import pack_payload, unpack_payload
+from .ip_connection_helper import unpack_view
 
 GetVoltageCallbackConfiguration = namedtuple('VoltageCallbackConfiguration', ['period', 'value_has_to_change', 'option', 'minimum', 'maximum'])
 GetCalibration = namedtuple('Calibration', ['offset', 'gain'])
 GetChannelLEDStatusConfig = namedtuple('ChannelLEDStatusConfig', ['minimum', 'maximum', 'config'])
 GetAllVoltagesCallbackConfiguration = namedtuple('AllVoltagesCallbackConfiguration', ['period', 'value_has_to_change'])
 
+# Precompiled structs of the fixed size payloads
+_UINT8 = struct.Struct('<B')
+_INT32 = struct.Struct('<i')
+_INT32_PAIR = struct.Struct('<2i')
+_VOLTAGE = struct.Struct('<Bi')
+_SET_VOLTAGE_CALLBACK_CONFIGURATION = struct.Struct('<BI?cii')
+_GET_VOLTAGE_CALLBACK_CONFIGURATION = struct.Struct('<I?cii')
+_ALL_VOLTAGES_CALLBACK_CONFIGURATION = struct.Struct('<I?')
+_CALIBRATION = struct.Struct('<2i2i')
+_CHANNEL_LED_CONFIG = struct.Struct('<BB')
+_SET_CHANNEL_LED_STATUS_CONFIG = struct.Struct('<BiiB')
+_GET_CHANNEL_LED_STATUS_CONFIG = struct.Struct('<iiB')
+
 
 @unique
 class CallbackID(Enum):
@@ -49,6 +64,23 @@ class FunctionID(Enum):
     GET_ALL_VOLTAGES_CALLBACK_CONFIGURATION = 16
 
 
+_FID_GET_VOLTAGE = FunctionID.GET_VOLTAGE.value
+_FID_SET_VOLTAGE_CALLBACK_CONFIGURATION = FunctionID.SET_VOLTAGE_CALLBACK_CONFIGURATION.value
+_FID_GET_VOLTAGE_CALLBACK_CONFIGURATION = FunctionID.GET_VOLTAGE_CALLBACK_CONFIGURATION.value
+_FID_SET_SAMPLE_RATE = FunctionID.SET_SAMPLE_RATE.value
+_FID_GET_SAMPLE_RATE = FunctionID.GET_SAMPLE_RATE.value
+_FID_SET_CALIBRATION = FunctionID.SET_CALIBRATION.value
+_FID_GET_CALIBRATION = FunctionID.GET_CALIBRATION.value
+_FID_GET_ADC_VALUES = FunctionID.GET_ADC_VALUES.value
+_FID_SET_CHANNEL_LED_CONFIG = FunctionID.SET_CHANNEL_LED_CONFIG.value
+_FID_GET_CHANNEL_LED_CONFIG = FunctionID.GET_CHANNEL_LED_CONFIG.value
+_FID_SET_CHANNEL_LED_STATUS_CONFIG = FunctionID.SET_CHANNEL_LED_STATUS_CONFIG.value
+_FID_GET_CHANNEL_LED_STATUS_CONFIG = FunctionID.GET_CHANNEL_LED_STATUS_CONFIG.value
+_FID_GET_ALL_VOLTAGES = FunctionID.GET_ALL_VOLTAGES.value
+_FID_SET_ALL_VOLTAGES_CALLBACK_CONFIGURATION = FunctionID.SET_ALL_VOLTAGES_CALLBACK_CONFIGURATION.value
+_FID_GET_ALL_VOLTAGES_CALLBACK_CONFIGURATION = FunctionID.GET_ALL_VOLTAGES_CALLBACK_CONFIGURATION.value
+
+
 @unique
 class ChannelLedStatusConfig(Enum):
     """
@@ -77,6 +109,7 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
     """
     Measures two DC voltages between -35V and +35V with 24bit resolution each
     """
+    __slots__ = ()
 
     DEVICE_IDENTIFIER = DeviceIdentifier.BRICKLET_INDUSTRIAL_DUAL_ANALOG_IN_V2
     DEVICE_DISPLAY_NAME = 'Industrial Dual Analog In Bricklet 2.0'
@@ -107,6 +140,8 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
         """
         Returns the voltage for the given channel.
 
+        If you need the voltages of both channels, use :func:`Get All Voltages`,
+        which returns both with a single request.
 
         If you want to get the value periodically, it is recommended to use the
         :cb:`Voltage` callback. You can set the callback configuration
@@ -116,11 +151,13 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
 
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_VOLTAGE,
-            data=pack_payload((int(channel),), 'B'),
+            function_id=_FID_GET_VOLTAGE,
+            payload_struct=_UINT8,
+            payload_args=(int(channel),),
             response_expected=True
         )
-        return self.__value_to_si(unpack_payload(payload, 'i'))
+        value, = _INT32.unpack_from(payload)
+        return self.__value_to_si(value)
 
     async def set_voltage_callback_configuration(self, channel, period=0, value_has_to_change=False, option=ThresholdOption.OFF, minimum=0, maximum=0, response_expected=True):  # pylint: disable=too-many-arguments
         """
@@ -159,16 +196,16 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_VOLTAGE_CALLBACK_CONFIGURATION,
-            data=pack_payload(
-              (
+            function_id=_FID_SET_VOLTAGE_CALLBACK_CONFIGURATION,
+            payload_struct=_SET_VOLTAGE_CALLBACK_CONFIGURATION,
+            payload_args=(
                 int(channel),
                 int(period),
                 bool(value_has_to_change),
-                option.value.encode('ascii'),
+                option.encoded,
                 self.__si_to_value(minimum),
                 self.__si_to_value(maximum),
-              ), 'B I ! c i i'),
+            ),
             response_expected=response_expected
         )
 
@@ -178,30 +215,39 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_VOLTAGE_CALLBACK_CONFIGURATION,
-            data=pack_payload((channel,), 'B'),
+            function_id=_FID_GET_VOLTAGE_CALLBACK_CONFIGURATION,
+            payload_struct=_UINT8,
+            payload_args=(channel,),
             response_expected=True
         )
-        period, value_has_to_change, option, minimum, maximum = unpack_payload(payload, 'I ! c i i')
-        option = ThresholdOption(option)
+        period, value_has_to_change, option, minimum, maximum = _GET_VOLTAGE_CALLBACK_CONFIGURATION.unpack_from(payload)
+        option = ThresholdOption.from_encoded(option)
         minimum, maximum = self.__value_to_si(minimum), self.__value_to_si(maximum)
-        return GetVoltageCallbackConfiguration(period, value_has_to_change, option, minimum, maximum)
+        return GetVoltageCallbackConfiguration._make((period, value_has_to_change, option, minimum, maximum))
 
-    async def get_all_voltages(self):
+    async def get_all_voltages(self, raw=False):
         """
-        Returns the voltage for the given channel.
+        Returns the voltages of both channels. This takes a single request
+        instead of calling :func:`Get Voltage` for each channel.
 
+        If *raw* is set, the voltages of both channels are returned in mV as a
+        buffer of two int32 values without decoding them.
+        See :func:`ip_connection_helper.unpack_view`.
 
-        If you want to get the value periodically, it is recommended to use the
-        :cb:`Voltage` callback. You can set the callback configuration
-        with :func:`Set Voltage Callback Configuration`.
+        If you want to get the values periodically, it is recommended to use the
+        :cb:`All Voltages` callback. You can set the callback configuration
+        with :func:`Set All Voltages Callback Configuration`.
+
+        .. versionadded:: 2.0.6$nbsp;(Plugin)
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_ALL_VOLTAGES,
+            function_id=_FID_GET_ALL_VOLTAGES,
             response_expected=True
         )
-        value1, value2 = unpack_payload(payload, '2i')
+        if raw:
+            return unpack_view(payload, 'i')
+        value1, value2 = _INT32_PAIR.unpack_from(payload)
         return self.__value_to_si(value1), self.__value_to_si(value2)
 
     async def set_all_voltages_callback_configuration(self, period=0, value_has_to_change=False, response_expected=True):
@@ -222,15 +268,28 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_ALL_VOLTAGES_CALLBACK_CONFIGURATION,
-            data=pack_payload(
-              (
-                int(period),
-                bool(value_has_to_change),
-              ), 'I !'),
+            function_id=_FID_SET_ALL_VOLTAGES_CALLBACK_CONFIGURATION,
+            payload_struct=_ALL_VOLTAGES_CALLBACK_CONFIGURATION,
+            payload_args=(int(period), bool(value_has_to_change)),
             response_expected=response_expected
         )
 
+    async def stream_all_voltages(self, count, period=1):
+        """
+        Records *count* samples of the :cb:`All Voltages` callback and returns
+        them as an array.array of ints in mV, alternating between channel 0 and 1.
+        The payloads are copied into the array as they are, so no objects are
+        created per sample, which makes it suitable for high sample rates.
+
+        The callback is enabled with the given *period* in ms and disabled when
+        done. While recording, the callbacks are not passed to the queue
+        registered with :cb:`All Voltages`. Only one recording can run at a
+        time, and it fails with a NotConnectedError, if the connection is closed.
+        """
+        assert count > 0
+
+        return await self._record_callback(CallbackID.ALL_VOLTAGES, array('i'), 2 * count, self.set_all_voltages_callback_configuration, period)
+
     async def get_all_voltages_callback_configuration(self):
         """
         Returns the callback configuration as set by
@@ -240,10 +299,10 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_VOLTAGE_CALLBACK_CONFIGURATION,
+            function_id=_FID_GET_ALL_VOLTAGES_CALLBACK_CONFIGURATION,
             response_expected=True
         )
-        return GetAllVoltagesCallbackConfiguration(*unpack_payload(payload, 'I !'))
+        return GetAllVoltagesCallbackConfiguration._make(_ALL_VOLTAGES_CALLBACK_CONFIGURATION.unpack_from(payload))
 
     async def set_sample_rate(self, rate, response_expected=True):
         """
@@ -251,13 +310,14 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
         and 976 samples per second. Decreasing the sample rate will also decrease the
         noise on the data.
         """
-        if isinstance(rate, SamplingRate):
+        if not isinstance(rate, SamplingRate):
             rate = SamplingRate(rate)
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_SAMPLE_RATE,
-            data=pack_payload((rate.value,), 'B'),
+            function_id=_FID_SET_SAMPLE_RATE,
+            payload_struct=_UINT8,
+            payload_args=(rate.value,),
             response_expected=response_expected
         )
 
@@ -267,11 +327,12 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_SAMPLE_RATE,
+            function_id=_FID_GET_SAMPLE_RATE,
             response_expected=True
         )
 
-        return SamplingRate(unpack_payload(payload, 'B'))
+        rate, = _UINT8.unpack_from(payload)
+        return SamplingRate(rate)
 
     async def set_calibration(self, offset, gain, response_expected=True):
         """
@@ -281,14 +342,14 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
         is already factory calibrated by Tinkerforge. It should not be necessary
         for you to use this function
         """
+        offset_channel0, offset_channel1 = offset
+        gain_channel0, gain_channel1 = gain
+
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_CALIBRATION,
-            data=pack_payload(
-              (
-                list(map(int, offset)),
-                list(map(int, gain))
-              ), '2i 2i'),
+            function_id=_FID_SET_CALIBRATION,
+            payload_struct=_CALIBRATION,
+            payload_args=(int(offset_channel0), int(offset_channel1), int(gain_channel0), int(gain_channel1)),
             response_expected=response_expected
         )
 
@@ -298,11 +359,12 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_CALIBRATION,
+            function_id=_FID_GET_CALIBRATION,
             response_expected=True
         )
 
-        return GetCalibration(*unpack_payload(payload, '2i 2i'))
+        offset_channel0, offset_channel1, gain_channel0, gain_channel1 = _CALIBRATION.unpack_from(payload)
+        return GetCalibration._make(((offset_channel0, offset_channel1), (gain_channel0, gain_channel1)))
 
     async def get_adc_values(self):
         """
@@ -311,11 +373,11 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_ADC_VALUES,
+            function_id=_FID_GET_ADC_VALUES,
             response_expected=True
         )
 
-        return unpack_payload(payload, '2i')
+        return _INT32_PAIR.unpack_from(payload)
 
     async def set_channel_led_config(self, channel, config, response_expected=True):
         """
@@ -334,12 +396,9 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_CHANNEL_LED_CONFIG,
-            data=pack_payload(
-              (
-                int(channel),
-                config.value,
-              ), 'B B'),
+            function_id=_FID_SET_CHANNEL_LED_CONFIG,
+            payload_struct=_CHANNEL_LED_CONFIG,
+            payload_args=(int(channel), config.value),
             response_expected=response_expected
         )
 
@@ -352,12 +411,13 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
 
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_CHANNEL_LED_CONFIG,
-            data=pack_payload((int(channel),), 'B'),
+            function_id=_FID_GET_CHANNEL_LED_CONFIG,
+            payload_struct=_UINT8,
+            payload_args=(int(channel),),
             response_expected=True
         )
-
-        return LedConfig(unpack_payload(payload, 'B'))
+        config, = _UINT8.unpack_from(payload)
+        return LedConfig(config)
 
     async def set_channel_led_status_config(self, channel, minimum, maximum, config, response_expected=True):  # pylint: disable=too-many-arguments
         """
@@ -388,14 +448,14 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_CHANNEL_LED_STATUS_CONFIG,
-            data=pack_payload(
-              (
+            function_id=_FID_SET_CHANNEL_LED_STATUS_CONFIG,
+            payload_struct=_SET_CHANNEL_LED_STATUS_CONFIG,
+            payload_args=(
                 int(channel),
                 self.__si_to_value(minimum),
                 self.__si_to_value(maximum),
                 config.value,
-              ), 'B i i B'),
+            ),
             response_expected=response_expected
         )
 
@@ -408,15 +468,15 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
 
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_CHANNEL_LED_STATUS_CONFIG,
-            data=pack_payload((int(channel),), 'B'),
+            function_id=_FID_GET_CHANNEL_LED_STATUS_CONFIG,
+            payload_struct=_UINT8,
+            payload_args=(int(channel),),
             response_expected=True
         )
-
-        minimum, maximum, config = unpack_payload(payload, 'i i B')
+        minimum, maximum, config = _GET_CHANNEL_LED_STATUS_CONFIG.unpack_from(payload)
         config = ChannelLedStatusConfig(config)
         minimum, maximum = self.__value_to_si(minimum), self.__value_to_si(maximum)
-        return GetChannelLEDStatusConfig(minimum, maximum, config)
+        return GetChannelLEDStatusConfig._make((minimum, maximum, config))
 
     @staticmethod
     def __value_to_si(value):
@@ -427,15 +487,19 @@ class BrickletIndustrialDualAnalogInV2(BrickletWithMCU):
 
     @staticmethod
     def __si_to_value(value):
-        return int(value * 1000)
+        """
+        Convert the SI value to the sensor value. The value is rounded, because
+        int() truncates floats like 1.001 * 1000 = 1000.9999999999999.
+        """
+        return round(value * 1000)
 
     def _process_callback_payload(self, header, payload):
         if header['function_id'] is CallbackID.VOLTAGE:
-            channel, value = unpack_payload(payload, self.CALLBACK_FORMATS[header['function_id']])
+            channel, value = _VOLTAGE.unpack_from(payload)
             header['sid'] = channel
             result = self.__value_to_si(value), True    # payload, done
         else:
-            value1, value2 = unpack_payload(payload, self.CALLBACK_FORMATS[header['function_id']])
+            value1, value2 = _INT32_PAIR.unpack_from(payload)
             header['sid'] = 2
             result = (self.__value_to_si(value1), self.__value_to_si(value2)), True    # payload, done
         return result
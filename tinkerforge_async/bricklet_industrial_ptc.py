@@ -13,5 +13,7 @@ class BrickletIndustrialPtc(BrickletPtcV2):
     """
     Reads temperatures from Pt100 und Pt1000 sensors
     """
+    __slots__ = ()
+
     DEVICE_IDENTIFIER = DeviceIdentifier.BRICKLET_INDUSTRIAL_PTC
     DEVICE_DISPLAY_NAME = 'Industrial PTC Bricklet'
@@ -7,12 +7,16 @@ Tinkerforge ip connection and also handles conversion of raw units to SI units.
 """
 from collections import namedtuple
 from enum import Enum, unique
+import struct
 
 from .devices import DeviceIdentifier, BrickletWithMCU
-from .ip_connection_helper import pack_payload, unpack_payload
 
 GetIndicator = namedtuple('Indicator', ['top_left', 'top_right', 'bottom'])
 
+# Precompiled structs of the payloads
+_UINT8 = struct.Struct('<B')
+_INDICATOR = struct.Struct('<BBB')
+
 
 @unique
 class CallbackID(Enum):
@@ -35,6 +39,13 @@ class FunctionID(Enum):
     GET_INDICATOR = 5
 
 
+_FID_GET_MOTION_DETECTED = FunctionID.GET_MOTION_DETECTED.value
+_FID_SET_SENSITIVITY = FunctionID.SET_SENSITIVITY.value
+_FID_GET_SENSITIVITY = FunctionID.GET_SENSITIVITY.value
+_FID_SET_INDICATOR = FunctionID.SET_INDICATOR.value
+_FID_GET_INDICATOR = FunctionID.GET_INDICATOR.value
+
+
 class BrickletMotionDetectorV2(BrickletWithMCU):
     """
     Passive infrared (PIR) motion sensor with 12m range and dimmable backlight
@@ -70,10 +81,11 @@ class BrickletMotionDetectorV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_MOTION_DETECTED,
+            function_id=_FID_GET_MOTION_DETECTED,
             response_expected=True
         )
-        return bool(unpack_payload(payload, 'B'))
+        value, = _UINT8.unpack_from(payload)
+        return bool(value)
 
     async def set_sensitivity(self, sensitivity=50, response_expected=True):
         """
@@ -90,8 +102,9 @@ class BrickletMotionDetectorV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_SENSITIVITY,
-            data=pack_payload((int(sensitivity),), 'B'),
+            function_id=_FID_SET_SENSITIVITY,
+            payload_struct=_UINT8,
+            payload_args=(sensitivity,),
             response_expected=response_expected
         )
 
@@ -101,10 +114,11 @@ class BrickletMotionDetectorV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_SENSITIVITY,
+            function_id=_FID_GET_SENSITIVITY,
             response_expected=True
         )
-        return unpack_payload(payload, 'B')
+        sensitivity, = _UINT8.unpack_from(payload)
+        return sensitivity
 
     async def set_indicator(self, top_left=0, top_right=0, bottom=0, response_expected=True):
         """
@@ -113,19 +127,14 @@ class BrickletMotionDetectorV2(BrickletWithMCU):
         (0-255). A value of 0 turns the LED off and a value of 255 turns the LED
         to full brightness.
         """
-        assert 0 <= top_left <= 255
-        assert 0 <= top_right <= 255
-        assert 0 <= bottom <= 255
+        # All values must be within [0, 255], i.e. no bit other than the lower 8 bits may be set
+        assert not (top_left | top_right | bottom) & ~0xFF
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_INDICATOR,
-            data=pack_payload(
-              (
-                int(top_left),
-                int(top_right),
-                int(bottom),
-              ), 'B B B'),
+            function_id=_FID_SET_INDICATOR,
+            payload_struct=_INDICATOR,
+            payload_args=(top_left, top_right, bottom),
             response_expected=response_expected
         )
 
@@ -135,8 +144,12 @@ class BrickletMotionDetectorV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_INDICATOR,
+            function_id=_FID_GET_INDICATOR,
             response_expected=True
         )
 
-        return GetIndicator(*unpack_payload(payload, 'B B B'))
+        return GetIndicator._make(_INDICATOR.unpack_from(payload))
+
+    def _process_callback_payload(self, header, payload):
+        # Both callbacks have no payload, so there is nothing to decode
+        return None, True    # payload, done
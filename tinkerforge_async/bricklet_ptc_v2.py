@@ -8,14 +8,21 @@ Tinkerforge ip connection and also handles conversion of raw units to SI units.
 from collections import namedtuple
 from decimal import Decimal
 from enum import Enum, unique
+import struct
 
 from .devices import DeviceIdentifier, BrickletWithMCU, ThresholdOption
-from .ip_connection_helper import pack_payload, unpack_payload
+from .ip_connection_helper import unpack_payload
 
 GetTemperatureCallbackConfiguration = namedtuple('TemperatureCallbackConfiguration', ['period', 'value_has_to_change', 'option', 'minimum', 'maximum'])
 GetResistanceCallbackConfiguration = namedtuple('ResistanceCallbackConfiguration', ['period', 'value_has_to_change', 'option', 'minimum', 'maximum'])
 GetMovingAverageConfiguration = namedtuple('MovingAverageConfiguration', ['moving_average_length_resistance', 'moving_average_length_temperature'])
 
+# Precompiled structs of the payloads
+_UINT8 = struct.Struct('<B')
+_BOOL = struct.Struct('<?')
+_CALLBACK_CONFIGURATION = struct.Struct('<I?cii')
+_MOVING_AVERAGE_CONFIGURATION = struct.Struct('<HH')
+
 
 @unique
 class CallbackID(Enum):
@@ -49,6 +56,23 @@ class FunctionID(Enum):
     GET_SENSOR_CONNECTED_CALLBACK_CONFIGURATION = 17
 
 
+_FID_GET_TEMPERATURE = FunctionID.GET_TEMPERATURE.value
+_FID_SET_TEMPERATURE_CALLBACK_CONFIGURATION = FunctionID.SET_TEMPERATURE_CALLBACK_CONFIGURATION.value
+_FID_GET_TEMPERATURE_CALLBACK_CONFIGURATION = FunctionID.GET_TEMPERATURE_CALLBACK_CONFIGURATION.value
+_FID_GET_RESISTANCE = FunctionID.GET_RESISTANCE.value
+_FID_SET_RESISTANCE_CALLBACK_CONFIGURATION = FunctionID.SET_RESISTANCE_CALLBACK_CONFIGURATION.value
+_FID_GET_RESISTANCE_CALLBACK_CONFIGURATION = FunctionID.GET_RESISTANCE_CALLBACK_CONFIGURATION.value
+_FID_SET_NOISE_REJECTION_FILTER = FunctionID.SET_NOISE_REJECTION_FILTER.value
+_FID_GET_NOISE_REJECTION_FILTER = FunctionID.GET_NOISE_REJECTION_FILTER.value
+_FID_IS_SENSOR_CONNECTED = FunctionID.IS_SENSOR_CONNECTED.value
+_FID_SET_WIRE_MODE = FunctionID.SET_WIRE_MODE.value
+_FID_GET_WIRE_MODE = FunctionID.GET_WIRE_MODE.value
+_FID_SET_MOVING_AVERAGE_CONFIGURATION = FunctionID.SET_MOVING_AVERAGE_CONFIGURATION.value
+_FID_GET_MOVING_AVERAGE_CONFIGURATION = FunctionID.GET_MOVING_AVERAGE_CONFIGURATION.value
+_FID_SET_SENSOR_CONNECTED_CALLBACK_CONFIGURATION = FunctionID.SET_SENSOR_CONNECTED_CALLBACK_CONFIGURATION.value
+_FID_GET_SENSOR_CONNECTED_CALLBACK_CONFIGURATION = FunctionID.GET_SENSOR_CONNECTED_CALLBACK_CONFIGURATION.value
+
+
 @unique
 class LineFilter(Enum):
     """
@@ -83,6 +107,8 @@ class BrickletPtcV2(BrickletWithMCU):
     """
     Reads temperatures from Pt100 und Pt1000 sensors
     """
+    __slots__ = ('__sensor_type',)
+
     DEVICE_IDENTIFIER = DeviceIdentifier.BRICKLET_PTC_V2
     DEVICE_DISPLAY_NAME = 'PTC Bricklet 2.0'
 
@@ -141,7 +167,7 @@ class BrickletPtcV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_TEMPERATURE,
+            function_id=_FID_GET_TEMPERATURE,
             response_expected=True
         )
         return self.__value_to_si_temperature(unpack_payload(payload, 'i'))
@@ -182,15 +208,15 @@ class BrickletPtcV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_TEMPERATURE_CALLBACK_CONFIGURATION,
-            data=pack_payload(
-              (
+            function_id=_FID_SET_TEMPERATURE_CALLBACK_CONFIGURATION,
+            payload_struct=_CALLBACK_CONFIGURATION,
+            payload_args=(
                 int(period),
                 bool(value_has_to_change),
-                option.value.encode('ascii'),
+                option.encoded,
                 self.__si_temperature_to_value(minimum),
-                self.__si_temperature_to_value(maximum)
-              ), 'I ! c i i'),
+                self.__si_temperature_to_value(maximum),
+            ),
             response_expected=response_expected
         )
 
@@ -200,13 +226,13 @@ class BrickletPtcV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_TEMPERATURE_CALLBACK_CONFIGURATION,
+            function_id=_FID_GET_TEMPERATURE_CALLBACK_CONFIGURATION,
             response_expected=True
         )
-        period, value_has_to_change, option, minimum, maximum = unpack_payload(payload, 'I ! c i i')
-        option = ThresholdOption(option)
+        period, value_has_to_change, option, minimum, maximum = _CALLBACK_CONFIGURATION.unpack_from(payload)
+        option = ThresholdOption.from_encoded(option)
         minimum, maximum = self.__value_to_si_temperature(minimum), self.__value_to_si_temperature(maximum)
-        return GetTemperatureCallbackConfiguration(period, value_has_to_change, option, minimum, maximum)
+        return GetTemperatureCallbackConfiguration._make((period, value_has_to_change, option, minimum, maximum))
 
     async def get_resistance(self):
         """
@@ -224,7 +250,7 @@ class BrickletPtcV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_RESISTANCE,
+            function_id=_FID_GET_RESISTANCE,
             response_expected=True
         )
         return self.__value_to_si_resistance(unpack_payload(payload, 'i'))
@@ -267,15 +293,15 @@ class BrickletPtcV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_RESISTANCE_CALLBACK_CONFIGURATION,
-            data=pack_payload(
-              (
+            function_id=_FID_SET_RESISTANCE_CALLBACK_CONFIGURATION,
+            payload_struct=_CALLBACK_CONFIGURATION,
+            payload_args=(
                 int(period),
                 bool(value_has_to_change),
-                option.value.encode('ascii'),
+                option.encoded,
                 self.__si_resistance_to_value(minimum),
-                self.__si_resistance_to_value(maximum)
-              ), 'I ! c i i'),
+                self.__si_resistance_to_value(maximum),
+            ),
             response_expected=response_expected
         )
 
@@ -285,13 +311,13 @@ class BrickletPtcV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_RESISTANCE_CALLBACK_CONFIGURATION,
+            function_id=_FID_GET_RESISTANCE_CALLBACK_CONFIGURATION,
             response_expected=True
         )
-        period, value_has_to_change, option, minimum, maximum = unpack_payload(payload, 'I ! c i i')
-        option = ThresholdOption(option)
+        period, value_has_to_change, option, minimum, maximum = _CALLBACK_CONFIGURATION.unpack_from(payload)
+        option = ThresholdOption.from_encoded(option)
         minimum, maximum = self.__value_to_si_resistance(minimum), self.__value_to_si_resistance(maximum)
-        return GetResistanceCallbackConfiguration(period, value_has_to_change, option, minimum, maximum)
+        return GetResistanceCallbackConfiguration._make((period, value_has_to_change, option, minimum, maximum))
 
     async def set_noise_rejection_filter(self, line_filter=LineFilter.FREQUENCY_50HZ, response_expected=True):
         """
@@ -307,8 +333,9 @@ class BrickletPtcV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_NOISE_REJECTION_FILTER,
-            data=pack_payload((line_filter.value,), 'B'),
+            function_id=_FID_SET_NOISE_REJECTION_FILTER,
+            payload_struct=_UINT8,
+            payload_args=(line_filter.value,),
             response_expected=response_expected
         )
 
@@ -319,7 +346,7 @@ class BrickletPtcV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_NOISE_REJECTION_FILTER,
+            function_id=_FID_GET_NOISE_REJECTION_FILTER,
             response_expected=True
         )
         return LineFilter(unpack_payload(payload, 'B'))
@@ -338,7 +365,7 @@ class BrickletPtcV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.IS_SENSOR_CONNECTED,
+            function_id=_FID_IS_SENSOR_CONNECTED,
             response_expected=True
         )
         return unpack_payload(payload, '!')
@@ -356,8 +383,9 @@ class BrickletPtcV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_WIRE_MODE,
-            data=pack_payload((mode.value,), 'B'),
+            function_id=_FID_SET_WIRE_MODE,
+            payload_struct=_UINT8,
+            payload_args=(mode.value,),
             response_expected=response_expected
         )
 
@@ -367,7 +395,7 @@ class BrickletPtcV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_WIRE_MODE,
+            function_id=_FID_GET_WIRE_MODE,
             response_expected=True
         )
         return WireMode(unpack_payload(payload, 'B'))
@@ -394,12 +422,9 @@ class BrickletPtcV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_MOVING_AVERAGE_CONFIGURATION,
-            data=pack_payload(
-              (
-                int(moving_average_length_resistance),
-                int(moving_average_length_temperature),
-              ), 'H H'),
+            function_id=_FID_SET_MOVING_AVERAGE_CONFIGURATION,
+            payload_struct=_MOVING_AVERAGE_CONFIGURATION,
+            payload_args=(int(moving_average_length_resistance), int(moving_average_length_temperature)),
             response_expected=response_expected
         )
 
@@ -409,11 +434,11 @@ class BrickletPtcV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_MOVING_AVERAGE_CONFIGURATION,
+            function_id=_FID_GET_MOVING_AVERAGE_CONFIGURATION,
             response_expected=True
         )
 
-        return GetMovingAverageConfiguration(*unpack_payload(payload, 'H H'))
+        return GetMovingAverageConfiguration._make(_MOVING_AVERAGE_CONFIGURATION.unpack_from(payload))
 
     async def set_sensor_connected_callback_configuration(self, enabled=False, response_expected=True):
         """
@@ -426,8 +451,9 @@ class BrickletPtcV2(BrickletWithMCU):
         """
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_SENSOR_CONNECTED_CALLBACK_CONFIGURATION,
-            data=pack_payload((bool(enabled),), '!'),
+            function_id=_FID_SET_SENSOR_CONNECTED_CALLBACK_CONFIGURATION,
+            payload_struct=_BOOL,
+            payload_args=(bool(enabled),),
             response_expected=response_expected
         )
 
@@ -439,7 +465,7 @@ class BrickletPtcV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_SENSOR_CONNECTED_CALLBACK_CONFIGURATION,
+            function_id=_FID_GET_SENSOR_CONNECTED_CALLBACK_CONFIGURATION,
             response_expected=True
         )
         return unpack_payload(payload, '!')
@@ -7,13 +7,18 @@ Tinkerforge ip connection and also handles conversion of raw units to SI units.
 """
 from collections import namedtuple
 from enum import Enum, unique
+import struct
 
 from .devices import DeviceIdentifier, Device
-from .ip_connection_helper import pack_payload, unpack_payload
 
 GetSegments = namedtuple('Segments', ['segments', 'brightness', 'colon'])
 GetIdentity = namedtuple('Identity', ['uid', 'connected_uid', 'position', 'hardware_version', 'firmware_version', 'device_identifier'])
 
+# Precompiled structs of the payloads
+_SEGMENTS = struct.Struct('<4BB?')
+_UINT16 = struct.Struct('<H')
+_COUNTER = struct.Struct('<hhhI')
+
 
 @unique
 class CallbackID(Enum):
@@ -34,6 +39,12 @@ class FunctionID(Enum):
     GET_COUNTER_VALUE = 4
 
 
+_FID_SET_SEGMENTS = FunctionID.SET_SEGMENTS.value
+_FID_GET_SEGMENTS = FunctionID.GET_SEGMENTS.value
+_FID_START_COUNTER = FunctionID.START_COUNTER.value
+_FID_GET_COUNTER_VALUE = FunctionID.GET_COUNTER_VALUE.value
+
+
 class BrickletSegmentDisplay4x7(Device):
     """
     Four 7-segment displays with switchable colon
@@ -74,18 +85,16 @@ class BrickletSegmentDisplay4x7(Device):
         The brightness can be set between 0 (dark) and 7 (bright). The colon
         parameter turns the colon of the display on or off.
         """
-        assert all(0 <= segment <= 127 for segment in segments)
+        segment0, segment1, segment2, segment3 = segments
+        # All segments must be within [0, 127], i.e. no bit other than the lower 7 bits may be set
+        assert not (segment0 | segment1 | segment2 | segment3) & ~0x7F
         assert 0 <= brightness <= 7
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_SEGMENTS,
-            data=pack_payload(
-              (
-                list(map(int, segments)),
-                int(brightness),
-                bool(colon),
-              ), '4B B !'),
+            function_id=_FID_SET_SEGMENTS,
+            payload_struct=_SEGMENTS,
+            payload_args=(segment0, segment1, segment2, segment3, brightness, colon),
             response_expected=response_expected
         )
 
@@ -96,10 +105,11 @@ class BrickletSegmentDisplay4x7(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_SEGMENTS,
+            function_id=_FID_GET_SEGMENTS,
             response_expected=True
         )
-        return GetSegments(*unpack_payload(payload, '4B B !'))
+        segment0, segment1, segment2, segment3, brightness, colon = _SEGMENTS.unpack_from(payload)
+        return GetSegments._make(((segment0, segment1, segment2, segment3), brightness, colon))
 
     async def start_counter(self, value_from, value_to, increment=1, length=1000, response_expected=True):  # pylint: disable=too-many-arguments
         """
@@ -122,14 +132,9 @@ class BrickletSegmentDisplay4x7(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.START_COUNTER,
-            data=pack_payload(
-              (
-                int(value_from),
-                int(value_to),
-                int(increment),
-                int(length),
-              ), 'h h h I'),
+            function_id=_FID_START_COUNTER,
+            payload_struct=_COUNTER,
+            payload_args=(value_from, value_to, increment, length),
             response_expected=response_expected
         )
 
@@ -141,7 +146,12 @@ class BrickletSegmentDisplay4x7(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_COUNTER_VALUE,
+            function_id=_FID_GET_COUNTER_VALUE,
             response_expected=True
         )
-        return unpack_payload(payload, 'H')
+        value, = _UINT16.unpack_from(payload)
+        return value
+
+    def _process_callback_payload(self, header, payload):
+        # The Counter Finished callback has no payload, so there is nothing to decode
+        return None, True    # payload, done
@@ -7,12 +7,22 @@ Tinkerforge ip connection and also handles conversion of raw units to SI units.
 """
 from collections import namedtuple
 from enum import Enum, unique
+import struct
 
 from .devices import DeviceIdentifier, BrickletWithMCU
-from .ip_connection_helper import pack_payload, unpack_payload
 
 GetSegments = namedtuple('Segments', ['segments', 'colon', 'tick'])
 
+# Precompiled structs of the payloads
+_BOOL = struct.Struct('<?')
+_UINT8 = struct.Struct('<B')
+_UINT16 = struct.Struct('<H')
+# The segments, the colon dots packed into a bit field and the tick mark
+_SEGMENTS = struct.Struct('<4BBB')
+_NUMERIC_VALUE = struct.Struct('<4b')
+_SELECTED_SEGMENT = struct.Struct('<B?')
+_COUNTER = struct.Struct('<hhhI')
+
 
 @unique
 class CallbackID(Enum):
@@ -38,10 +48,23 @@ class FunctionID(Enum):
     GET_COUNTER_VALUE = 9
 
 
+_FID_SET_SEGMENTS = FunctionID.SET_SEGMENTS.value
+_FID_GET_SEGMENTS = FunctionID.GET_SEGMENTS.value
+_FID_SET_BRIGHTNESS = FunctionID.SET_BRIGHTNESS.value
+_FID_GET_BRIGHTNESS = FunctionID.GET_BRIGHTNESS.value
+_FID_SET_NUMERIC_VALUE = FunctionID.SET_NUMERIC_VALUE.value
+_FID_SET_SELECTED_SEGMENT = FunctionID.SET_SELECTED_SEGMENT.value
+_FID_GET_SELECTED_SEGMENT = FunctionID.GET_SELECTED_SEGMENT.value
+_FID_START_COUNTER = FunctionID.START_COUNTER.value
+_FID_GET_COUNTER_VALUE = FunctionID.GET_COUNTER_VALUE.value
+
+
 class BrickletSegmentDisplay4x7V2(BrickletWithMCU):
     """
     Four 7-segment displays with switchable dots
     """
+    __slots__ = ()
+
     DEVICE_IDENTIFIER = DeviceIdentifier.BRICKLET_SEGMENT_DISPLAY_4x7_V2
     DEVICE_DISPLAY_NAME = 'Segment Display 4x7 Bricklet 2.0'
 
@@ -75,32 +98,60 @@ class BrickletSegmentDisplay4x7V2(BrickletWithMCU):
            :alt: Indices of segments
            :align: center
         """
-        assert (len(segments) == 4 and all(0 <= segment <= 255 for segment in segments))
+        assert len(segments) == 4
         assert len(colon) == 2
-        tick = bool(tick)
+        segment0, segment1, segment2, segment3 = segments
+        colon0, colon1 = colon
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_SEGMENTS,
-            data=pack_payload(
-              (
-                list(map(int, segments)),
-                list(map(bool, colon)),
-                tick
-              ), '4B 2! !'),
+            function_id=_FID_SET_SEGMENTS,
+            payload_struct=_SEGMENTS,
+            payload_args=(
+                int(segment0),
+                int(segment1),
+                int(segment2),
+                int(segment3),
+                bool(colon0) | bool(colon1) << 1,
+                bool(tick),
+            ),
             response_expected=response_expected
         )
 
+    async def set_segments_batch(self, frames, response_expected=True):
+        """
+        Sends a sequence of prepacked frames to the display, one :func:`Set Segments`
+        request per frame. *frames* can be any object supporting the buffer
+        protocol, e.g. bytes or a numpy uint8 array of shape (N, 6). Each frame
+        consists of 6 bytes: the four segments, the colon dots as a bit field
+        (bit 0: upper dot, bit 1: lower dot) and the tick mark.
+
+        The frames are sent as slices of the buffer, so no per frame conversion
+        is done in Python.
+        """
+        frames = memoryview(frames).cast('B')
+        if len(frames) % _SEGMENTS.size:
+            raise ValueError(f'The frames must be a multiple of {_SEGMENTS.size} bytes long.')
+
+        for offset in range(0, len(frames), _SEGMENTS.size):
+            await self.ipcon.send_request(
+                device=self,
+                function_id=_FID_SET_SEGMENTS,
+                data=frames[offset:offset + _SEGMENTS.size],
+                response_expected=response_expected
+            )
+
     async def get_segments(self):
         """
         Returns the segment data as set by :func:`Set Segments`.
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_SEGMENTS,
+            function_id=_FID_GET_SEGMENTS,
             response_expected=True
         )
-        return GetSegments(*unpack_payload(payload, '4B 2! !'))
+        segment0, segment1, segment2, segment3, colon, tick = _SEGMENTS.unpack_from(payload)
+        return GetSegments._make(((segment0, segment1, segment2, segment3), (bool(colon & 0b01), bool(colon & 0b10)), bool(tick)))
 
     async def set_brightness(self, brightness=7, response_expected=True):
         """
@@ -112,8 +163,9 @@ class BrickletSegmentDisplay4x7V2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_BRIGHTNESS,
-            data=pack_payload((int(brightness),), 'B'),
+            function_id=_FID_SET_BRIGHTNESS,
+            payload_struct=_UINT8,
+            payload_args=(int(brightness),),
             response_expected=response_expected
         )
 
@@ -123,10 +175,11 @@ class BrickletSegmentDisplay4x7V2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_BRIGHTNESS,
+            function_id=_FID_GET_BRIGHTNESS,
             response_expected=True
         )
-        return unpack_payload(payload, 'B')
+        brightness, = _UINT8.unpack_from(payload)
+        return brightness
 
     async def set_numeric_value(self, value, response_expected=True):
         """
@@ -145,12 +198,13 @@ class BrickletSegmentDisplay4x7V2(BrickletWithMCU):
 
         Example: A call with [-2, -1, 4, 2] will result in a display of "- 42".
         """
-        value = list(map(int, value))
+        digit0, digit1, digit2, digit3 = value
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_NUMERIC_VALUE,
-            data=pack_payload((value,), '4b'),
+            function_id=_FID_SET_NUMERIC_VALUE,
+            payload_struct=_NUMERIC_VALUE,
+            payload_args=(int(digit0), int(digit1), int(digit2), int(digit3)),
             response_expected=response_expected
         )
 
@@ -169,8 +223,9 @@ class BrickletSegmentDisplay4x7V2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_SELECTED_SEGMENT,
-            data=pack_payload((int(segment), bool(value)), 'B !'),
+            function_id=_FID_SET_SELECTED_SEGMENT,
+            payload_struct=_SELECTED_SEGMENT,
+            payload_args=(int(segment), bool(value)),
             response_expected=response_expected
         )
 
@@ -182,12 +237,14 @@ class BrickletSegmentDisplay4x7V2(BrickletWithMCU):
 
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_SELECTED_SEGMENT,
-            data=pack_payload((int(segment),), 'B'),
+            function_id=_FID_GET_SELECTED_SEGMENT,
+            payload_struct=_UINT8,
+            payload_args=(int(segment),),
             response_expected=True
         )
 
-        return unpack_payload(payload, '!')
+        value, = _BOOL.unpack_from(payload)
+        return value
 
     async def start_counter(self, value_from, value_to, increment, length, response_expected=True):  # pylint: disable=too-many-arguments
         """
@@ -206,14 +263,9 @@ class BrickletSegmentDisplay4x7V2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.START_COUNTER,
-            data=pack_payload(
-              (
-                int(value_from),
-                int(value_to),
-                int(increment),
-                int(length),
-              ), 'h h h I'),
+            function_id=_FID_START_COUNTER,
+            payload_struct=_COUNTER,
+            payload_args=(int(value_from), int(value_to), int(increment), int(length)),
             response_expected=response_expected
         )
 
@@ -225,7 +277,8 @@ class BrickletSegmentDisplay4x7V2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_COUNTER_VALUE,
+            function_id=_FID_GET_COUNTER_VALUE,
             response_expected=True
         )
-        return unpack_payload(payload, 'H')
+        value, = _UINT16.unpack_from(payload)
+        return value
@@ -6,14 +6,19 @@ implemented using Python AsyncIO. It does the low-lvel communication with the
 Tinkerforge ip connection and also handles conversion of raw units to SI units.
 """
 from collections import namedtuple
-from decimal import Decimal
 from enum import Enum, unique
+import struct
 
 from .devices import DeviceIdentifier, Device, ThresholdOption
-from .ip_connection_helper import pack_payload, unpack_payload
 
 GetTemperatureCallbackThreshold = namedtuple('TemperatureCallbackThreshold', ['option', 'minimum', 'maximum'])
 
+# Precompiled structs of the payloads
+_UINT8 = struct.Struct('<B')
+_INT16 = struct.Struct('<h')
+_UINT32 = struct.Struct('<I')
+_THRESHOLD = struct.Struct('<chh')
+
 
 @unique
 class CallbackID(Enum):
@@ -40,6 +45,17 @@ class FunctionID(Enum):
     GET_I2C_MODE = 11
 
 
+_FID_GET_TEMPERATURE = FunctionID.GET_TEMPERATURE.value
+_FID_SET_TEMPERATURE_CALLBACK_PERIOD = FunctionID.SET_TEMPERATURE_CALLBACK_PERIOD.value
+_FID_GET_TEMPERATURE_CALLBACK_PERIOD = FunctionID.GET_TEMPERATURE_CALLBACK_PERIOD.value
+_FID_SET_TEMPERATURE_CALLBACK_THRESHOLD = FunctionID.SET_TEMPERATURE_CALLBACK_THRESHOLD.value
+_FID_GET_TEMPERATURE_CALLBACK_THRESHOLD = FunctionID.GET_TEMPERATURE_CALLBACK_THRESHOLD.value
+_FID_SET_DEBOUNCE_PERIOD = FunctionID.SET_DEBOUNCE_PERIOD.value
+_FID_GET_DEBOUNCE_PERIOD = FunctionID.GET_DEBOUNCE_PERIOD.value
+_FID_SET_I2C_MODE = FunctionID.SET_I2C_MODE.value
+_FID_GET_I2C_MODE = FunctionID.GET_I2C_MODE.value
+
+
 @unique
 class I2cOption(Enum):
     """
@@ -54,6 +70,8 @@ class BrickletTemperature(Device):
     """
     Measures ambient temperature with 0.5 K accuracy
     """
+    __slots__ = ('__cache',)
+
     DEVICE_IDENTIFIER = DeviceIdentifier.BRICKLET_TEMPERATURE
     DEVICE_DISPLAY_NAME = 'Temperature Bricklet'
 
@@ -76,6 +94,8 @@ class BrickletTemperature(Device):
         super().__init__(self.DEVICE_DISPLAY_NAME, uid, ipcon)
 
         self.api_version = (2, 0, 1)
+        # The configuration last set or read, see the *cached* parameter of the getters
+        self.__cache = {}
 
     async def get_temperature(self):
         """
@@ -89,10 +109,11 @@ class BrickletTemperature(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_TEMPERATURE,
+            function_id=_FID_GET_TEMPERATURE,
             response_expected=True
         )
-        return self.__value_to_si(unpack_payload(payload, 'h'))
+        value, = _INT16.unpack_from(payload)
+        return self.__value_to_si(value)
 
     async def set_temperature_callback_period(self, period=0, response_expected=True):
         """
@@ -108,21 +129,32 @@ class BrickletTemperature(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_TEMPERATURE_CALLBACK_PERIOD,
-            data=pack_payload((int(period),), 'I'),
+            function_id=_FID_SET_TEMPERATURE_CALLBACK_PERIOD,
+            payload_struct=_UINT32,
+            payload_args=(int(period),),
             response_expected=response_expected,
         )
+        self.__cache['temperature_callback_period'] = int(period)
 
-    async def get_temperature_callback_period(self):
+    async def get_temperature_callback_period(self, cached=False):
         """
         Returns the period as set by :func:`Set Temperature Callback Period`.
+
+        If *cached* is True, the period last set or read by this object is
+        returned without querying the bricklet. The cache does not notice, if the
+        bricklet was reset.
         """
+        if cached and 'temperature_callback_period' in self.__cache:
+            return self.__cache['temperature_callback_period']
+
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_TEMPERATURE_CALLBACK_PERIOD,
+            function_id=_FID_GET_TEMPERATURE_CALLBACK_PERIOD,
             response_expected=True
         )
-        return unpack_payload(payload, 'I')
+        period, = _UINT32.unpack_from(payload)
+        self.__cache['temperature_callback_period'] = period
+        return period
 
     async def set_temperature_callback_threshold(self, option=ThresholdOption.OFF, minimum=0, maximum=0, response_expected=True):
         """
@@ -147,8 +179,9 @@ class BrickletTemperature(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_TEMPERATURE_CALLBACK_THRESHOLD,
-            data=pack_payload((option.value.encode('ascii'), self.__si_to_value(minimum), self.__si_to_value(maximum)), 'c h h'),
+            function_id=_FID_SET_TEMPERATURE_CALLBACK_THRESHOLD,
+            payload_struct=_THRESHOLD,
+            payload_args=(option.encoded, self.__si_to_value(minimum), self.__si_to_value(maximum)),
             response_expected=response_expected
         )
 
@@ -158,13 +191,13 @@ class BrickletTemperature(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_TEMPERATURE_CALLBACK_THRESHOLD,
+            function_id=_FID_GET_TEMPERATURE_CALLBACK_THRESHOLD,
             response_expected=True
         )
-        option, minimum, maximum = unpack_payload(payload, 'c h h')
-        option = ThresholdOption(option)
+        option, minimum, maximum = _THRESHOLD.unpack_from(payload)
+        option = ThresholdOption.from_encoded(option)
         minimum, maximum = self.__value_to_si(minimum), self.__value_to_si(maximum)
-        return GetTemperatureCallbackThreshold(option, minimum, maximum)
+        return GetTemperatureCallbackThreshold._make((option, minimum, maximum))
 
     async def set_debounce_period(self, debounce_period=100, response_expected=True):
         """
@@ -184,21 +217,32 @@ class BrickletTemperature(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_DEBOUNCE_PERIOD,
-            data=pack_payload((int(debounce_period),), 'I'),
+            function_id=_FID_SET_DEBOUNCE_PERIOD,
+            payload_struct=_UINT32,
+            payload_args=(int(debounce_period),),
             response_expected=response_expected
         )
+        self.__cache['debounce_period'] = int(debounce_period)
 
-    async def get_debounce_period(self):
+    async def get_debounce_period(self, cached=False):
         """
         Returns the debounce period as set by :func:`Set Debounce Period`.
+
+        If *cached* is True, the debounce period last set or read by this object is
+        returned without querying the bricklet. The cache does not notice, if the
+        bricklet was reset.
         """
+        if cached and 'debounce_period' in self.__cache:
+            return self.__cache['debounce_period']
+
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_DEBOUNCE_PERIOD,
+            function_id=_FID_GET_DEBOUNCE_PERIOD,
             response_expected=True
         )
-        return unpack_payload(payload, 'I')
+        debounce_period, = _UINT32.unpack_from(payload)
+        self.__cache['debounce_period'] = debounce_period
+        return debounce_period
 
     async def set_i2c_mode(self, mode=I2cOption.FAST, response_expected=True):
         """
@@ -221,8 +265,9 @@ class BrickletTemperature(Device):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_I2C_MODE,
-            data=pack_payload((mode.value,), 'B'),
+            function_id=_FID_SET_I2C_MODE,
+            payload_struct=_UINT8,
+            payload_args=(mode.value,),
             response_expected=response_expected
         )
 
@@ -234,22 +279,30 @@ class BrickletTemperature(Device):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_I2C_MODE,
+            function_id=_FID_GET_I2C_MODE,
             response_expected=True
         )
-        return I2cOption(unpack_payload(payload, 'B'))
+        mode, = _UINT8.unpack_from(payload)
+        return I2cOption(mode)
 
     @staticmethod
     def __value_to_si(value):
         """
-        Convert to the sensor value to SI units
+        Convert to the sensor value to SI units. The value is returned as a
+        float, because the resolution of the sensor is well within the precision
+        of a float and a decimal.Decimal is expensive to create for every callback.
         """
-        return Decimal(value) / 100
+        return value / 100
 
     @staticmethod
     def __si_to_value(value):
-        return int(value * 100)
+        """
+        Convert the SI value to the sensor value. The value is rounded, because
+        int() truncates floats like 0.29 * 100 = 28.999999999999996.
+        """
+        return round(value * 100)
 
     def _process_callback_payload(self, header, payload):
-        payload = unpack_payload(payload, self.CALLBACK_FORMATS[header['function_id']])
-        return self.__value_to_si(payload), True    # payload, done
+        # Both callbacks return the temperature as an int16, so there is no need to look up the format
+        value, = _INT16.unpack_from(payload)
+        return self.__value_to_si(value), True    # payload, done
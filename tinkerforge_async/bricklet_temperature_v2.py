@@ -5,15 +5,20 @@ Module for the Tinkerforge Temperature Bricklet 2.0
 implemented using Python AsyncIO. It does the low-lvel communication with the
 Tinkerforge ip connection and also handles conversion of raw units to SI units.
 """
+from array import array
 from collections import namedtuple
-from decimal import Decimal
 from enum import Enum, unique
+import struct
 
 from .devices import DeviceIdentifier, BrickletWithMCU, ThresholdOption
-from .ip_connection_helper import pack_payload, unpack_payload
 
 GetTemperatureCallbackConfiguration = namedtuple('TemperatureCallbackConfiguration', ['period', 'value_has_to_change', 'option', 'minimum', 'maximum'])
 
+# Precompiled structs of the payloads
+_UINT8 = struct.Struct('<B')
+_INT16 = struct.Struct('<h')
+_CALLBACK_CONFIGURATION = struct.Struct('<I?chh')
+
 
 @unique
 class CallbackID(Enum):
@@ -35,6 +40,13 @@ class FunctionID(Enum):
     GET_HEATER_CONFIGURATION = 6
 
 
+_FID_GET_TEMPERATURE = FunctionID.GET_TEMPERATURE.value
+_FID_SET_TEMPERATURE_CALLBACK_CONFIGURATION = FunctionID.SET_TEMPERATURE_CALLBACK_CONFIGURATION.value
+_FID_GET_TEMPERATURE_CALLBACK_CONFIGURATION = FunctionID.GET_TEMPERATURE_CALLBACK_CONFIGURATION.value
+_FID_SET_HEATER_CONFIGURATION = FunctionID.SET_HEATER_CONFIGURATION.value
+_FID_GET_HEATER_CONFIGURATION = FunctionID.GET_HEATER_CONFIGURATION.value
+
+
 @unique
 class HeaterConfig(Enum):
     """
@@ -48,6 +60,8 @@ class BrickletTemperatureV2(BrickletWithMCU):
     """
     Measures ambient temperature with 0.2 K accuracy
     """
+    __slots__ = ()
+
     DEVICE_IDENTIFIER = DeviceIdentifier.BRICKLET_TEMPTERATURE_V2
     DEVICE_DISPLAY_NAME = 'Temperature Bricklet 2.0'
 
@@ -82,10 +96,11 @@ class BrickletTemperatureV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_TEMPERATURE,
+            function_id=_FID_GET_TEMPERATURE,
             response_expected=True
         )
-        return self.__value_to_si(unpack_payload(payload, 'h'))
+        value, = _INT16.unpack_from(payload)
+        return self.__value_to_si(value)
 
     async def set_temperature_callback_configuration(self, period=0, value_has_to_change=False, option=ThresholdOption.OFF, minimum=0, maximum=0, response_expected=True):  # pylint: disable=too-many-arguments
         """
@@ -126,15 +141,9 @@ class BrickletTemperatureV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_TEMPERATURE_CALLBACK_CONFIGURATION,
-            data=pack_payload(
-              (
-                int(period),
-                bool(value_has_to_change),
-                option.value.encode('ascii'),
-                self.__si_to_value(minimum),
-                self.__si_to_value(maximum)
-              ), 'I ! c h h'),
+            function_id=_FID_SET_TEMPERATURE_CALLBACK_CONFIGURATION,
+            payload_struct=_CALLBACK_CONFIGURATION,
+            payload_args=(period, value_has_to_change, option.encoded, self.__si_to_value(minimum), self.__si_to_value(maximum)),
             response_expected=response_expected
         )
 
@@ -144,13 +153,30 @@ class BrickletTemperatureV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_TEMPERATURE_CALLBACK_CONFIGURATION,
+            function_id=_FID_GET_TEMPERATURE_CALLBACK_CONFIGURATION,
             response_expected=True
         )
-        period, value_has_to_change, option, minimum, maximum = unpack_payload(payload, 'I ! c h h')
-        option = ThresholdOption(option)
-        minimum, maximum = self.__value_to_si(minimum), self.__value_to_si(maximum)
-        return GetTemperatureCallbackConfiguration(period, value_has_to_change, option, minimum, maximum)
+        period, value_has_to_change, option, minimum, maximum = _CALLBACK_CONFIGURATION.unpack_from(payload)
+        return GetTemperatureCallbackConfiguration._make(
+            (period, value_has_to_change, ThresholdOption.from_encoded(option), self.__value_to_si(minimum), self.__value_to_si(maximum))
+        )
+
+    async def stream_temperatures(self, count, period=1):
+        """
+        Records *count* samples of the :cb:`Temperature` callback and returns
+        them as an array.array of ints in °C/100. The payloads are copied into
+        the array as they are, so no objects are created per sample, which makes
+        it suitable for long running data acquisition. Use
+        numpy.frombuffer(samples, dtype='h') / 100 to convert them to °C.
+
+        The callback is enabled with the given *period* in ms and disabled when
+        done. While recording, the callbacks are not passed to the queue
+        registered with :cb:`Temperature`. Only one recording can run at a
+        time, and it fails with a NotConnectedError, if the connection is closed.
+        """
+        assert count > 0
+
+        return await self._record_callback(CallbackID.TEMPERATURE, array('h'), count, self.set_temperature_callback_configuration, period)
 
     async def set_heater_configuration(self, heater_config=HeaterConfig.DISABLED, response_expected=True):
         """
@@ -161,8 +187,9 @@ class BrickletTemperatureV2(BrickletWithMCU):
 
         await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.SET_HEATER_CONFIGURATION,
-            data=pack_payload((heater_config.value,), 'B'),
+            function_id=_FID_SET_HEATER_CONFIGURATION,
+            payload_struct=_UINT8,
+            payload_args=(heater_config.value,),
             response_expected=response_expected
         )
 
@@ -172,23 +199,30 @@ class BrickletTemperatureV2(BrickletWithMCU):
         """
         _, payload = await self.ipcon.send_request(
             device=self,
-            function_id=FunctionID.GET_HEATER_CONFIGURATION,
+            function_id=_FID_GET_HEATER_CONFIGURATION,
             response_expected=True
         )
-
-        return HeaterConfig(unpack_payload(payload, 'B'))
+        heater_config, = _UINT8.unpack_from(payload)
+        return HeaterConfig(heater_config)
 
     @staticmethod
     def __value_to_si(value):
         """
-        Convert to the sensor value to SI units
+        Convert to the sensor value to SI units. The value is returned as a
+        float, because the resolution of the sensor is well within the precision
+        of a float and a decimal.Decimal is expensive to create for every callback.
         """
-        return Decimal(value) / 100
+        return value / 100
 
     @staticmethod
     def __si_to_value(value):
-        return int(value * 100)
+        """
+        Convert the SI value to the sensor value. The value is rounded, because
+        int() truncates floats like 0.29 * 100 = 28.999999999999996.
+        """
+        return round(value * 100)
 
     def _process_callback_payload(self, header, payload):
-        payload = unpack_payload(payload, self.CALLBACK_FORMATS[header['function_id']])
-        return self.__value_to_si(payload), True    # payload, done
+        # The only callback returns the temperature as an int16, so there is no need to look up the format
+        value, = _INT16.unpack_from(payload)
+        return self.__value_to_si(value), True    # payload, done
@@ -5,6 +5,7 @@ This file contains all base classes used by Bricks and bricklets
 import asyncio
 from collections import namedtuple
 from enum import Enum, unique
+import sys
 import time
 
 from .ip_connection_helper import base58decode, pack_payload, unpack_payload, uid64_to_uid32
@@ -31,6 +32,25 @@ class ThresholdOption(Enum):
     LESS_THAN = '<'
     GREATER_THAN = '>'
 
+    def __init__(self, value):
+        # The option is sent as a char. Encode it once, instead of on every request.
+        self.encoded = value.encode('ascii')
+
+    @classmethod
+    def from_encoded(cls, value):
+        """
+        Returns the option of the char *value* received from the device. Raises
+        a ValueError if *value* is not a valid option.
+        """
+        try:
+            return _THRESHOLD_OPTIONS[value]
+        except KeyError:
+            raise ValueError(f'{value!r} is not a valid {cls.__name__}') from None
+
+
+# Maps the option char received from the device to the ThresholdOption. This is faster than calling the enum.
+_THRESHOLD_OPTIONS = {option.encoded: option for option in ThresholdOption}
+
 
 @unique
 class DeviceIdentifier(Enum):
@@ -104,11 +124,26 @@ class Device:
     The base class of the most basic Brick or Bricklet. These are typically the
     older devices, that do not have a microcontroller on board.
     """
+    __slots__ = ('__display_name', 'uid', '__ipcon', 'api_version', '__registered_queues', '__stream', 'high_level_callbacks', '__weakref__')
+
     RESPONSE_EXPECTED_INVALID_FUNCTION_ID = 0
     RESPONSE_EXPECTED_ALWAYS_TRUE = 1   # getter
     RESPONSE_EXPECTED_TRUE = 2          # setter
     RESPONSE_EXPECTED_FALSE = 3         # setter, default
 
+    # A lookup table, that maps the function id of a callback to the CallbackID
+    # of the device. It has an entry for every function id (uint8) and is
+    # populated by __init_subclass__().
+    _callback_ids = (None,) * 256
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # CallbackID is defined by the brick/bricklet
+        callback_ids = list(cls._callback_ids)
+        for callback_id in getattr(cls, 'CallbackID', ()):
+            callback_ids[callback_id.value] = callback_id
+        cls._callback_ids = tuple(callback_ids)
+
     def __str__(self):
         return f'{self.__display_name} with uid {self.uid} connected at {self.__ipcon}'
 
@@ -133,6 +168,7 @@ class Device:
         self.__ipcon = ipcon
         self.api_version = (0, 0, 0)
         self.__registered_queues = {}
+        self.__stream = None    # (function id, samples, length, future) while _record_callback() is running
         self.high_level_callbacks = {}
 
         self.ipcon.add_device(self)
@@ -148,31 +184,49 @@ class Device:
         """
         This function will push the payload to the output queue. If the payload is None, no callback will be triggered.
         """
+        # The samples of _record_callback() are recorded before looking up the callback queue, because the recording
+        # does not need a registered queue
+        if self.__stream is not None and header['function_id'] == self.__stream[0]:
+            _, samples, length, received = self.__stream
+            samples.frombytes(payload)
+            if len(samples) >= length and not received.done():
+                received.set_result(None)
+            return
+
+        # The queues are registered by the int value of the callback id, so the callback can be dropped before decoding
+        # it, if nobody is listening. The KeyError is handled by the ip connection.
+        queue = self.__registered_queues[header['function_id']]
         self.__process_callback_header(header)
         payload, done = self._process_callback_payload(header, payload)
 
         if done:
+            # The function_id is converted to the CallbackID, because it is passed on to the user
+            callback = {
+                'timestamp': int(time.time()),
+                'sender': self,
+                'function_id': header['function_id'],
+                'sid': header.get('sid', 0),
+                'payload': payload,
+            }
             # Try to push it to the output queue. If the queue is full, drop the oldest packet and insert it again
             try:
-                self.__registered_queues[header['function_id']].put_nowait({
-                    'timestamp': int(time.time()),
-                    'sender': self,
-                    'function_id': header['function_id'],
-                    'sid': header.get('sid', 0),
-                    'payload': payload,
-                })
+                queue.put_nowait(callback)
             except asyncio.QueueFull:
                 # TODO: log a warning, that we are dropping packets
-                self.__registered_queues[header['function_id']].get_nowait()
-                self.__registered_queues[header['function_id']].put_nowait(payload)
+                queue.get_nowait()
+                queue.put_nowait(callback)
 
     def __process_callback_header(self, header):
-        # CallbackID is defined by the brick/bricklet
         try:
-            header['function_id'] = self.CallbackID(header['function_id'])
-        except ValueError:
-            # ValueError: raised if the function_id is unknown
-            raise UnknownFunctionError from None
+            callback_id = self._callback_ids[header['function_id']]
+        except (IndexError, TypeError):
+            # IndexError, TypeError: raised if the function_id is not an uint8, e.g. if it was already converted to an
+            # enum by the ip connection
+            callback_id = None
+        if callback_id is None:
+            # The function_id is unknown
+            raise UnknownFunctionError
+        header['function_id'] = callback_id
 
     def _process_callback_payload(self, header, payload):
         """
@@ -181,18 +235,64 @@ class Device:
         """
         return unpack_payload(payload, self.CALLBACK_FORMATS[header['function_id']]), True    # payload, done
 
+    async def _record_callback(self, callback_id, samples, length, set_callback_configuration, period):
+        """
+        Records the raw payloads of the callback *callback_id* into the
+        array.array *samples* until it holds *length* items and returns it. The
+        callback is enabled by calling the coroutine function
+        *set_callback_configuration* with *period* and disabled by calling it
+        without arguments when done. While recording, the callbacks are not
+        passed to the registered queue. Only one recording can run at a time.
+        If the connection is closed, the recording fails with a
+        NotConnectedError.
+        """
+        if self.__stream is not None:
+            raise RuntimeError(f'{self.__display_name} is already recording a callback.')
+
+        received = asyncio.get_running_loop().create_future()
+        self.__stream = callback_id.value, samples, length, received
+        try:
+            await set_callback_configuration(period)
+            await received
+        except BaseException:
+            self.__stream = None
+            try:
+                await set_callback_configuration()
+            except Exception:   # pylint: disable=broad-except
+                pass    # The callback might not be disabled, but do not replace the original error
+            raise
+        self.__stream = None
+        try:
+            await set_callback_configuration()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass    # All samples were received. Do not throw them away, because the callback could not be disabled.
+
+        del samples[length:]     # Drop the samples received while disabling the callback
+        if sys.byteorder == 'big':
+            samples.byteswap()  # The payload is little endian
+        return samples
+
+    def _cancel_recording(self, exc):
+        """
+        Fails a running _record_callback() with the exception *exc*. This is
+        called by the ip connection, when the connection is closed.
+        """
+        if self.__stream is not None and not self.__stream[3].done():
+            self.__stream[3].set_exception(exc)
+
     def register_event_queue(self, event_id, queue):
         """
         Registers the given *function* with the given *callback_id*.
         """
         # CallbackID is defined by the brick/bricklet
         if not isinstance(event_id, self.CallbackID):
-            event_id = event_id(event_id)
+            event_id = self.CallbackID(event_id)
 
+        # Use the int value as key, because the function id of the callbacks is an int
         if queue is None:
-            self.__registered_queues.pop(event_id, None)
+            self.__registered_queues.pop(event_id.value, None)
         else:
-            self.__registered_queues[event_id] = queue
+            self.__registered_queues[event_id.value] = queue
 
     async def get_identity(self):
         """
@@ -244,6 +344,8 @@ class DeviceWithMCU(Device):
     The base class for a more advanced Brick or Bricklet with a microcontroller
     on board.
     """
+    __slots__ = ()
+
     async def get_chip_temperature(self):
         """
         Returns the temperature in °C as measured inside the microcontroller. The
@@ -320,6 +422,8 @@ class BrickletWithMCU(DeviceWithMCU):
     The new Bricklets feature a microcontroller and this base class implements
     the generic function supported by the microcontroller.
     """
+    __slots__ = ()
+
     # Convenience imports, so that the user does not need to additionally import them
     BootloaderStatus = BootloaderStatus
     LedConfig = LedConfig
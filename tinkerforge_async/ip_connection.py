@@ -56,6 +56,22 @@ class Flags(Flag):
     FUNCTION_NOT_SUPPORTED = 128
 
 
+_FLAGS_OK_VALUE = Flags.OK.value    # pylint: disable=no-member
+# The flags checked for every reply. Looking up an enum member on its class is a lot slower than a global name.
+_FLAGS_OK = Flags.OK
+_FLAGS_FUNCTION_NOT_SUPPORTED = Flags.FUNCTION_NOT_SUPPORTED
+_FLAGS_INVALID_PARAMETER = Flags.INVALID_PARAMETER
+
+# Lookup tables used to decode the header of every packet. Calling the enum
+# instead is slow, especially for unknown values, which raise a ValueError.
+# The function id is an uint8, so it can index a table with an entry for every
+# function id.
+_FUNCTION_IDS = tuple(map({function_id.value: function_id for function_id in FunctionID}.get, range(256)))
+_FLAGS = {flag.value: flag for flag in Flags.__members__.values()}     # Iterating over a Flag skips Flags.OK
+
+# little endian (<), uid (I, uint32), size (B, uint8), function id, squence number, flags
+_HEADER = struct.Struct('<IBBBB')
+
 DEFAULT_WAIT_TIMEOUT = 2.5  # in seconds
 
 
@@ -67,7 +83,7 @@ class IPConnectionAsync:
     """
     BROADCAST_UID = 0  # The uid used to broadcast enumeration events
 
-    HEADER_FORMAT = '<IBBBB'  # little endian (<), uid (I, uint32), size (B, uint8), function id, squence number, flags
+    HEADER_FORMAT = _HEADER.format  # little endian (<), uid (I, uint32), size (B, uint8), function id, squence number, flags
 
     @property
     def uid(self):
@@ -115,6 +131,7 @@ class IPConnectionAsync:
         self.__sequence_number = 0
         self.__timeout = DEFAULT_WAIT_TIMEOUT
         self.__pending_requests = {}
+        self.__write_queue = []
         self.__next_nonce = 0
 
         self.__devices = {}
@@ -127,6 +144,7 @@ class IPConnectionAsync:
         self.__main_task = None
         self.__lock = None
         self.__sequence_number_queue = None
+        self.__oneway_sequence_number = 0
         self.__enumeration_queue = None
 
     def __repr__(self):
@@ -137,23 +155,18 @@ class IPConnectionAsync:
 
     @staticmethod
     def __parse_header(data):
-        uid, payload_size, function_id, options, flags = struct.unpack_from(IPConnectionAsync.HEADER_FORMAT, data)
-        try:
-            function_id = FunctionID(function_id)
+        uid, payload_size, function_id, options, flags = _HEADER.unpack_from(data)
+        # Do not assign an enum to unknown function ids, leave the int
+        if _FUNCTION_IDS[function_id] is not None:
+            function_id = _FUNCTION_IDS[function_id]
             if function_id in (FunctionID.GET_AUTHENTICATION_NONCE, FunctionID.AUTHENTICATE) and not uid == 1:
                 # Only the special uid 1 can reply with GET_AUTHENTICATION_NONCE or AUTHENTICATE
                 function_id = function_id.value
-        except ValueError:
-            # Do not assign an enum, leave the int
-            pass
         sequence_number = None if (options >> 4) & 0b1111 == 0 else (options >> 4) & 0b1111   # There is no sequence number if it is a callback (sequence_number == 0)
         response_expected = bool(options >> 3 & 0b1)
     #    options = options & 0b111 # Options for future use
-        try:
-            flags = Flags(flags)
-        except ValueError:
-            # Do not assign an enum, leave the int
-            pass
+        # Do not assign an enum to unknown flags, leave the int
+        flags = _FLAGS.get(flags, flags)
 
         return payload_size, \
             {
@@ -164,16 +177,18 @@ class IPConnectionAsync:
                 'flags': flags,
             }
 
-    async def __create_packet_header(self, payload_size, function_id, uid=None, response_expected=False):
+    @staticmethod
+    def __pack_packet_header(packet, function_id, sequence_number, uid=None, response_expected=False):
+        """
+        Writes the header to the beginning of the *packet* buffer, which must be
+        sized to hold the header and the payload.
+        """
         uid = IPConnectionAsync.BROADCAST_UID if uid is None else uid
-        packet_size = payload_size + struct.calcsize(IPConnectionAsync.HEADER_FORMAT)
-        sequence_number = await self.__sequence_number_queue.get()
         response_expected = bool(response_expected)
 
         sequence_number_and_options = (sequence_number << 4) | response_expected << 3
 
-        return (struct.pack(IPConnectionAsync.HEADER_FORMAT, uid, packet_size, function_id, sequence_number_and_options, Flags.OK.value),  # pylint: disable=no-member
-                sequence_number)
+        _HEADER.pack_into(packet, 0, uid, len(packet), function_id, sequence_number_and_options, _FLAGS_OK_VALUE)
 
     def add_device(self, device):
         """
@@ -195,40 +210,84 @@ class IPConnectionAsync:
             function_id=FunctionID.ENUMERATE
         )
 
-    async def send_request(self, device, function_id, data=b'', response_expected=False):
+    async def send_request(self, device, function_id, data=b'', response_expected=False, *, payload_struct=None, payload_args=()):  # pylint: disable=too-many-arguments
         """
         Creates a request, by prepending a header to the data and sends it to
-        the Tinkerforge host.
+        the Tinkerforge host. The *function_id* is either a FunctionID enum of
+        the device or its int value. The bricklets pass the int values, which
+        they keep in their _FID_* constants, so the enum is not unwrapped on
+        every call.
+        Instead of the packed *data*, a precompiled struct.Struct
+        *payload_struct* and its arguments *payload_args* can be passed as
+        keyword arguments. The payload is then packed directly into the
+        request.
         Returns: None, if 'response_expected' is *False*, else it will return
         a tuple (header, payload) returned by the host.
         """
         if not self.is_connected:
             raise NotConnectedError('Tinkerforge IP Connection not connected.')
 
-        header, sequence_number = await self.__create_packet_header(
-            payload_size=len(data),
-            function_id=function_id.value,
+        # Build the packet in a single buffer, instead of concatenating the header and the payload
+        if payload_struct is None:
+            request = bytearray(_HEADER.size + len(data))
+            request[_HEADER.size:] = data
+        else:
+            request = bytearray(_HEADER.size + payload_struct.size)
+            payload_struct.pack_into(request, _HEADER.size, *payload_args)
+        if response_expected:
+            sequence_number = await self.__sequence_number_queue.get()
+        else:
+            # There is no reply to match, so the request does not need to wait for a free sequence number. It is
+            # sent without suspending the caller.
+            self.__oneway_sequence_number = self.__oneway_sequence_number % 15 + 1
+            sequence_number = self.__oneway_sequence_number
+        self.__pack_packet_header(
+            request,
+            function_id=function_id if isinstance(function_id, int) else function_id.value,
+            sequence_number=sequence_number,
             uid=0 if device is None else device.uid,
             response_expected=response_expected,
         )
 
-        request = header + data
-
+        # Only build the log records if they are going to be logged, because this is called for every request
+        debug = self.__logger.isEnabledFor(logging.DEBUG)
         # If we are waiting for a response, send the request, then pass on the response as a future
-        self.__logger.debug('Sending request to device %(device)s (%(uid)s) and function %(function_id)s with sequence_number %(sequence_number)s: %(header)s - %(payload)s.', {'device': device, 'uid': device.uid if device is not None else None, 'function_id': function_id, 'sequence_number': sequence_number, 'header': header, 'payload': data})
+        if debug:
+            self.__logger.debug('Sending request to device %(device)s (%(uid)s) and function %(function_id)s with sequence_number %(sequence_number)s: %(header)s - %(payload)s.', {'device': device, 'uid': device.uid if device is not None else None, 'function_id': function_id, 'sequence_number': sequence_number, 'header': bytes(request[:_HEADER.size]), 'payload': bytes(request[_HEADER.size:])})
+        if not response_expected:
+            self.__queue_write(request)
+            return None
+
         try:
-            self.__writer.write(request)
-            if response_expected:
+            self.__queue_write(request)
+            if debug:
                 self.__logger.debug('Waiting for reply for request number %(sequence_number)s.', {'sequence_number': sequence_number})
-                # The future will be resolved by the main_loop() and __process_packet()
-                self.__pending_requests[sequence_number] = asyncio.Future()
-                header, payload = await asyncio.wait_for(self.__pending_requests[sequence_number], self.__timeout)
+            # The future will be resolved by the main_loop() and __process_packet()
+            self.__pending_requests[sequence_number] = asyncio.Future()
+            header, payload = await asyncio.wait_for(self.__pending_requests[sequence_number], self.__timeout)
+            if debug:
                 self.__logger.debug('Got reply for request number %(sequence_number)s: %(header)s - %(payload)s.', {'sequence_number': sequence_number, 'header': header, 'payload': payload})
-                return header, payload
+            return header, payload
         finally:
             # Return the sequence number
             self.__sequence_number_queue.put_nowait(sequence_number)
 
+    def __queue_write(self, request):
+        """
+        Queues the *request* for writing. All requests queued during one
+        iteration of the event loop are written by a single writelines() call,
+        so concurrent requests, e.g. those of batch.read(), share one syscall.
+        """
+        if not self.__write_queue:
+            asyncio.get_running_loop().call_soon(self.__flush_write_queue)
+        self.__write_queue.append(request)
+
+    def __flush_write_queue(self):
+        requests, self.__write_queue = self.__write_queue, []
+        # Requests queued before a disconnect are dropped, their futures are cancelled by __close_transport()
+        if requests and self.is_connected:
+            self.__writer.writelines(requests)
+
     @staticmethod
     def __parse_enumerate_payload(payload):
         uid, connected_uid, position, hardware_version, firmware_version, device_identifier, enumeration_type \
@@ -264,10 +323,10 @@ class IPConnectionAsync:
             raise NotConnectedError('Tinkerforge IP Connection not connected.')
         try:
             async with timeout(self.__timeout):
-                data = await self.__reader.read(struct.calcsize(IPConnectionAsync.HEADER_FORMAT))
+                data = await self.__reader.read(_HEADER.size)
                 packet_size, header = self.__parse_header(data)
 
-                payload = await self.__reader.read(packet_size - struct.calcsize(IPConnectionAsync.HEADER_FORMAT))
+                payload = await self.__reader.read(packet_size - _HEADER.size)
 
                 return header, payload
         except asyncio.TimeoutError:
@@ -291,32 +350,28 @@ class IPConnectionAsync:
                 # KeyError: raised if either the device is not registered with us or there is no output queue registered
                 # UnknownFunctionError is raised by _process_callback if there is no local function to process the callback.
                 # Maybe it is a global callback like an enumeration callback
-                try:
-                    header['function_id'] = FunctionID(header['function_id'])
-                    # This packet must be processed by the ip connection
-                    if header['function_id'] is FunctionID.CALLBACK_ENUMERATE:
-                        payload = self.__parse_enumerate_payload(payload)
-                        self.__logger.debug('Received enumeration: %(header)s - %(payload)s.', {'header': header, 'payload': payload})
-                        try:
-                            self.__enumeration_queue.put_nowait(payload)
-                        except asyncio.QueueFull:
-                            dropped_payload = self.__enumeration_queue.get_nowait()
-                            self.__logger.warning('Dropping packets. Too many callbacks. Dropped payload: %(payload)s.', {'payload': dropped_payload})
-                            self.__enumeration_queue.put_nowait(payload)
-
-                except ValueError:
-                    # raised if the functionID is unknown. This can happen if there was no device output queue
-                    # registered with the callback.
-                    pass
+                # The function id was already decoded by __parse_header(). If it is unknown, there was no device
+                # output queue registered with the callback.
+                # This packet must be processed by the ip connection
+                if header['function_id'] is FunctionID.CALLBACK_ENUMERATE:
+                    payload = self.__parse_enumerate_payload(payload)
+                    self.__logger.debug('Received enumeration: %(header)s - %(payload)s.', {'header': header, 'payload': payload})
+                    try:
+                        self.__enumeration_queue.put_nowait(payload)
+                    except asyncio.QueueFull:
+                        dropped_payload = self.__enumeration_queue.get_nowait()
+                        self.__logger.warning('Dropping packets. Too many callbacks. Dropped payload: %(payload)s.', {'payload': dropped_payload})
+                        self.__enumeration_queue.put_nowait(payload)
         elif header['response_expected']:
             try:
                 # Mark the future as done
                 future = self.__pending_requests.pop(header['sequence_number'])
-                if header['flags'] is Flags.OK:
+                flags = header['flags']
+                if flags is _FLAGS_OK:
                     future.set_result((header, payload))
-                elif header['flags'] is Flags.FUNCTION_NOT_SUPPORTED:
+                elif flags is _FLAGS_FUNCTION_NOT_SUPPORTED:
                     future.set_exception(AttributeError('Function not supported: {function_id}.'.format(function_id=header['function_id'])))
-                elif header['flags'] is Flags.INVALID_PARAMETER:
+                elif flags is _FLAGS_INVALID_PARAMETER:
                     future.set_exception(ValueError('Invalid parameter.'))
                 else:
                     future.set_result((header, payload))
@@ -343,8 +398,13 @@ class IPConnectionAsync:
             pass
         finally:
             self.__main_task = None
-            if self.is_connected:
-                await self.__close_transport()
+            try:
+                if self.is_connected:
+                    await self.__close_transport()
+            finally:
+                # The callbacks recorded by the devices will not arrive any more
+                for device in self.__devices.values():
+                    device._cancel_recording(NotConnectedError('Tinkerforge IP Connection closed.'))
 
     async def __get_client_nonce(self):
         """
@@ -489,6 +549,7 @@ class IPConnectionAsync:
     async def __close_transport(self):
         # Flush data
         try:
+            self.__flush_write_queue()
             self.__writer.write_eof()
             await self.__writer.drain()
             self.__writer.close()
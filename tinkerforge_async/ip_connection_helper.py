@@ -2,8 +2,10 @@
 """
 Some helper functions to encode and decode Tinkerforge protocol payloads.
 """
+from array import array
 import math
 import struct
+import sys
 
 # The following code is taken from the original Tinkerforge ip_connection.py
 BASE58 = '123456789abcdefghijkmnopqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ'
@@ -43,89 +45,138 @@ def base58decode(encoded):
     return value
 
 
-def pack_payload(data, form):
-    packed = b''
+# The compiled payload formats, indexed by the format string. See _compile_format() for details.
+_PAYLOAD_FORMATS = {}
+
+
+def _compile_format(form):
+    """
+    Compiles the payload format *form*, e.g. '4B 2! !', into a single
+    struct.Struct, so that the format string is only parsed once. Returns the
+    struct and a list with a (kind, length, value_count) tuple for each token
+    of the format. *length* is the number of bools of a bool list and
+    *value_count* the number of struct values used by the token. The list is
+    None, if the format only contains single numbers, which need no conversion.
+    """
+    struct_format = '<'
+    tokens = []
+    for token in form.split(' '):
+        if '!' in token:
+            if len(token) > 1:
+                length = int(token.replace('!', ''))
+                value_count = int(math.ceil(length / 8.0))
+                struct_format += '{0}B'.format(value_count)
+                tokens.append(('bools', length, value_count))
+            else:
+                # The bool is packed as an uint8, which is the same as '?'
+                struct_format += 'B'
+                tokens.append(('bool', 1, 1))
+        elif 's' in token:
+            struct_format += token
+            tokens.append(('string', 1, 1))
+        else:
+            struct_format += token
+            value_count = len(struct.unpack('<' + token, bytes(struct.calcsize('<' + token))))
+            kind = 'char' if 'c' in token else 'number'
+            # Tokens with a count, e.g. '4B', take and return a sequence
+            tokens.append((kind + 's' if len(token) > 1 else kind, 1, value_count))
 
-    for f, d in zip(form.split(' '), data):
-        if '!' in f:
-            if len(f) > 1:
-                if int(f.replace('!', '')) != len(d):
-                    raise ValueError('Incorrect bool list length')
+    if all(kind == 'number' for kind, _, _ in tokens):
+        tokens = None
 
-                p = [0] * int(math.ceil(len(d) / 8.0))
+    return struct.Struct(struct_format), tokens
 
-                for i, b in enumerate(d):
-                    if b:
-                        p[i // 8] |= 1 << (i % 8)
 
-                packed += struct.pack('<{0}B'.format(len(p)), *p)
-            else:
-                packed += struct.pack('<?', d)
-        elif 'c' in f:
-            if len(f) > 1:
-                packed += struct.pack('<' + f, *list(map(lambda char: bytes([ord(char)]), d)))
-            else:
-                packed += struct.pack('<' + f, bytes([ord(d)]))
-        elif 's' in f:
-            packed += struct.pack('<' + f, d)
-        elif len(f) > 1:
-            packed += struct.pack('<' + f, *d)
+def _get_format(form):
+    try:
+        return _PAYLOAD_FORMATS[form]
+    except KeyError:
+        compiled = _PAYLOAD_FORMATS[form] = _compile_format(form)
+        return compiled
+
+
+def pack_payload(data, form):
+    compiled, tokens = _get_format(form)
+    if tokens is None:
+        return compiled.pack(*data)
+
+    values = []
+
+    for (kind, length, _), d in zip(tokens, data):
+        if kind == 'bools':
+            if length != len(d):
+                raise ValueError('Incorrect bool list length')
+
+            p = [0] * int(math.ceil(len(d) / 8.0))
+
+            for i, b in enumerate(d):
+                if b:
+                    p[i // 8] |= 1 << (i % 8)
+
+            values.extend(p)
+        elif kind == 'bool':
+            values.append(bool(d))
+        elif kind == 'chars':
+            values.extend(bytes([ord(char)]) for char in d)
+        elif kind == 'char':
+            values.append(bytes([ord(d)]))
+        elif kind == 'numbers':
+            values.extend(d)
         else:
-            packed += struct.pack('<' + f, d)
+            values.append(d)
 
-    return packed
+    return compiled.pack(*values)
 
 
 def unpack_payload(data, form):
-    ret = []
     if not form or len(data) == 0:
         return None
 
-    for f in form.split(' '):
-        o = f
-
-        if '!' in f:
-            if len(f) > 1:
-                f = '{0}B'.format(int(math.ceil(int(f.replace('!', '')) / 8.0)))
-            else:
-                f = 'B'
-
-        f = '<' + f
-        length = struct.calcsize(f)
-        x = struct.unpack(f, data[:length])
+    compiled, tokens = _get_format(form)
+    x = compiled.unpack_from(data)
+    if tokens is None:
+        return x[0] if len(x) == 1 else list(x)
 
-        if '!' in o:
-            y = []
-
-            if len(o) > 1:
-                for i in range(int(o.replace('!', ''))):
-                    y.append(x[i // 8] & (1 << (i % 8)) != 0)
-            else:
-                y.append(x[0] != 0)
-
-            x = tuple(y)
-
-        if 'c' in f:
-            if len(x) > 1:
-                ret.append(tuple(map(lambda item: chr(ord(item)), x)))
-            else:
-                ret.append(chr(ord(x[0])))
-        elif 's' in f:
+    ret = []
+    offset = 0
+
+    for kind, length, value_count in tokens:
+        if kind == 'bools':
+            y = tuple(x[offset + i // 8] & (1 << (i % 8)) != 0 for i in range(length))
+            ret.append(y if length > 1 else y[0])
+        elif kind == 'bool':
+            ret.append(x[offset] != 0)
+        elif kind == 'string':
             # convert from byte-array to string, removing all null bytes
-            # Note: This works only in Python 3
-            s = str(x[0], 'latin-1').partition('\0')[0]
-
-            # strip null bytes
-            ret.append(s)
-
-        elif len(x) > 1:
-            ret.append(x)
+            ret.append(str(x[offset], 'latin-1').partition('\0')[0])
+        elif value_count > 1:
+            if kind == 'chars':
+                ret.append(tuple(chr(ord(item)) for item in x[offset:offset + value_count]))
+            else:
+                ret.append(x[offset:offset + value_count])
+        elif kind in ('char', 'chars'):
+            ret.append(chr(ord(x[offset])))
         else:
-            ret.append(x[0])
+            ret.append(x[offset])
 
-        data = data[length:]
+        offset += value_count
 
     if len(ret) == 1:
         return ret[0]
     else:
         return ret
+
+
+def unpack_view(data, form):
+    """
+    Returns the payload as a sequence of integers of the array type code *form*
+    (e.g. 'i' for int32) without decoding every value. On little endian machines
+    this is a read-only memoryview of the payload, otherwise the values are
+    copied to an array.array and byte swapped. Both support the buffer protocol.
+    """
+    if sys.byteorder == 'little':
+        return memoryview(data).cast(form)
+
+    values = array(form, data)
+    values.byteswap()
+    return values